@@ -0,0 +1,56 @@
+"""Import-time benchmark with a regression budget.
+
+Run from the repository root: `python bench/import_time.py [--runs N]`.
+Each module is imported in a fresh interpreter with `-X importtime`; the
+median cumulative import time is compared against its budget, and modules
+that must stay out of lightweight workers are checked for.
+"""
+import sys
+import argparse
+import subprocess
+from statistics import median
+
+
+# module: (budget in ms, modules it must not pull in)
+BUDGETS = {
+    "lib.features.lexical": (300, ["requests", "cryptography", "dateutil", "torch"]),
+    "lib.features.header": (300, ["requests", "cryptography", "dateutil", "torch"]),
+    "lib.data.extract": (400, ["requests", "cryptography", "dateutil", "torch"]),
+    "lib.data.load": (500, ["requests", "cryptography", "dateutil", "torch"]),
+}
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """Cumulative Import Time of a Module in ms, and the Modules it loaded."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys, {module}; print(*sys.modules)"],
+        capture_output=True, text=True, check=True
+    )
+    for line in reversed(result.stderr.splitlines()):
+        _, cumulative, name = line.split("|")
+        if name.strip() == module.split(".")[0] or name.strip() == module:
+            return int(cumulative) / 1000, result.stdout.split()
+    raise RuntimeError(f"No import time reported for {module}.")
+
+
+def main(runs: int) -> int:
+    failures = 0
+    for module, (budget, forbidden) in BUDGETS.items():
+        samples, loaded = [], []
+        for _ in range(runs):
+            elapsed, loaded = measure(module)
+            samples.append(elapsed)
+        elapsed = median(samples)
+        heavy = sorted(m for m in loaded if m.split(".")[0] in forbidden)
+        ok = elapsed <= budget and not heavy
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {module}: {elapsed:.1f}ms (budget {budget}ms)")
+        if heavy:
+            print(f"     eagerly imports: {', '.join(sorted({m.split('.')[0] for m in heavy}))}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    sys.exit(main(parser.parse_args().runs))
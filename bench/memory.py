@@ -0,0 +1,143 @@
+"""Memory benchmark of in-flight extraction.
+
+Run from the repository root: `python bench/memory.py [--levels 1000 10000]`.
+For each level, a fresh interpreter probes that many URLs against a local
+server (one redirect, then a response with a realistic header and cookie
+set) and keeps every feature instance alive, as the pipeline does between
+the probe and compute stages. It reports peak RSS and the bytes retained
+per in-flight URL, measured as RSS growth after a warm-up and a collection.
+The hop cache is disabled so only per-URL state is counted.
+"""
+import gc
+import os
+import sys
+import json
+import argparse
+import resource
+import subprocess
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+HEADERS = {
+    "Server": "nginx/1.25.3",
+    "Content-Type": "text/html; charset=utf-8",
+    "Content-Length": "48213",
+    "Cache-Control": "public, max-age=3600",
+    "Connection": "keep-alive",
+    "Keep-Alive": "timeout=5, max=100",
+    "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+    "Expires": "Thu, 01 Dec 2025 16:00:00 GMT",
+    "X-Content-Type-Options": "nosniff",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=63072000; includeSubDomains; preload",
+    "Content-Security-Policy": "default-src 'self'; script-src 'self' https://cdn.example.com; " * 4,
+    "Vary": "Accept-Encoding",
+    "ETag": '"5e1f-5b1d7c4a8b3c0"',
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        if self.path.startswith("/r/"):
+            self.send_response(301)
+            self.send_header("Location", self.path.replace("/r/", "/p/", 1))
+            self.send_header("Content-Length", "0")
+        else:
+            self.send_response(200)
+            for key, value in HEADERS.items():
+                self.send_header(key, value)
+            for name in ("session", "tracking", "consent"):
+                self.send_header("Set-Cookie", f"{name}={os.urandom(24).hex()}; Path=/; HttpOnly")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def current_rss() -> int:
+    """Resident Set Size in bytes, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def worker(level: int, concurrency: int) -> dict:
+    """Probe `level` URLs, keep them in flight and measure what they retain."""
+    from lib.features.base import URLComponent
+    from lib.features.header import HeaderFeatures
+    from lib.features.lexical import LexicalFeatures
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    def probe(i: int) -> list:
+        components = URLComponent(url=f"http://127.0.0.1:{port}/r/{i}")
+        feature_sets = [LexicalFeatures(components=components), HeaderFeatures(components=components)]
+        components.cp_digest
+        return feature_sets
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Warm up lazy imports and per-thread connection pools before the baseline.
+        for feature_sets in executor.map(probe, range(-concurrency, 0)):
+            for feature_set in feature_sets:
+                feature_set.model_dump(exclude={"components"}, warnings=False)
+        gc.collect()
+        before = current_rss()
+        in_flight = list(executor.map(probe, range(level)))
+    gc.collect()
+    probed = current_rss()
+
+    for feature_sets in in_flight:
+        for feature_set in feature_sets:
+            feature_set.model_dump(exclude={"components"}, warnings=False)
+    gc.collect()
+    computed = current_rss()
+
+    server.shutdown()
+    return {
+        "level": level,
+        "ok": sum(bool(f[0].components.cp_digest) for f in in_flight),
+        "probed_bytes_per_url": (probed - before) / level,
+        "computed_bytes_per_url": (computed - before) / level,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main(levels: list[int], concurrency: int) -> int:
+    env = {**os.environ, "HOP_CACHE_SIZE": "0"}
+    for level in levels:
+        result = subprocess.run(
+            [sys.executable, __file__, "--worker", str(level), "--concurrency", str(concurrency)],
+            capture_output=True, text=True, env=env
+        )
+        if result.returncode != 0:
+            print(result.stderr, file=sys.stderr)
+            return 1
+        stats = json.loads(result.stdout.splitlines()[-1])
+        print(
+            f"in-flight={stats['level']:>6} ok={stats['ok']:>6} "
+            f"probed={stats['probed_bytes_per_url'] / 1024:.1f}KB/url "
+            f"computed={stats['computed_bytes_per_url'] / 1024:.1f}KB/url "
+            f"peak_rss={stats['peak_rss_mb']:.0f}MB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.concurrency)))
+        sys.exit(0)
+    sys.exit(main(args.levels, args.concurrency))
@@ -0,0 +1,99 @@
+"""Probe tail-latency benchmark of the retry and hedging policy.
+
+Run from the repository root: `python bench/probe_latency.py [--urls N]`.
+A local server answers HEAD requests after an injected latency (mostly
+fast, with a slow tail) and fails a fraction of them with a dropped
+connection or a 503. The same URLs are probed under each policy, and
+the null rate (probes that return no chain) and per-URL p50/p99 times are
+reported.
+"""
+import os
+import sys
+import socket
+import random
+import argparse
+from time import monotonic, sleep
+from multiprocessing import Process
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+    slow_rate = 0.02
+    slow_latency = 1.5
+    drop_rate = 0.03
+    error_rate = 0.03
+
+    def do_HEAD(self):
+        roll = random.random()
+        if roll < self.drop_rate:
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        sleep(self.slow_latency if random.random() < self.slow_rate else random.uniform(0.002, 0.01))
+        self.send_response(503 if roll < self.drop_rate + self.error_rate else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def run(name: str, port: int, urls: int, concurrency: int, **policy) -> None:
+    from lib.features.probe import HopCache, RetryPolicy, follow
+
+    policy = RetryPolicy(**policy)
+    cache = HopCache(ttl=0, maxsize=0)
+
+    def probe(i: int) -> tuple[float, bool]:
+        start = monotonic()
+        chain = follow(f"http://127.0.0.1:{port}/{name}/{i}", timeout=3, cache=cache, policy=policy)
+        return monotonic() - start, bool(chain) and chain[-1].ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(probe, range(urls)))
+    times = [elapsed * 1000 for elapsed, _ in results]
+    nulls = sum(not ok for _, ok in results) / len(results)
+    counts = " ".join(f"{key}={value}" for key, value in sorted(policy.counts.items()) if key != "requests")
+    print(
+        f"{name:<14} null_rate={nulls:.3f} p50={percentile(times, 0.5):.1f}ms "
+        f"p99={percentile(times, 0.99):.1f}ms {counts}"
+    )
+
+
+def main(urls: int, concurrency: int) -> int:
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    # The server runs in its own process so it does not share the GIL with the probes.
+    server = Server(("127.0.0.1", 0), Handler)
+    port = server.server_address[1]
+    process = Process(target=server.serve_forever, daemon=True)
+    process.start()
+    server.server_close()
+    try:
+        run("single", port, urls, concurrency, retries=0)
+        run("retry", port, urls, concurrency, retries=2, backoff=0.05)
+        run("retry+hedge", port, urls, concurrency, retries=2, backoff=0.05, hedge=True)
+    finally:
+        process.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    sys.exit(main(args.urls, args.concurrency))
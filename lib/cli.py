@@ -0,0 +1,286 @@
+"""Streaming Feature Extraction CLI.
+
+Reads URLs (one per line) or JSONL objects with `url` and optional `label`
+from files or stdin, and writes features to stdout or a file as JSONL, CSV,
+Arrow IPC stream or NumPy. No database is involved. Items flow through the
+staged `Pipeline`, so rows come out in completion order, not input order.
+
+    cat urls.txt | python -m lib.cli --offline > features.jsonl
+    python -m lib.cli data.jsonl --features lexical,header -f arrow -o features.arrow
+    python -m lib.cli urls.txt --cache features.db --cache-ttl 3600 > features.jsonl
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+from abc import ABC, abstractmethod
+from time import monotonic
+from asyncio import run
+from importlib.util import find_spec
+from typing import IO, Any, Iterator, Optional
+
+from lib.data.pipeline import Pipeline
+from lib.features.graph import Projection
+
+
+FEATURE_SETS = {
+    "lexical": "LexicalFeatures",
+    "header": "HeaderFeatures",
+    "ngram": "NGramFeatures",
+    "lists": "ListFeatures",
+}
+FORMATS = ("jsonl", "csv", "arrow", "npy")
+
+
+def read_items(paths: list[str]) -> Iterator[dict[str, Any]]:
+    """Source Items from plain URL lines or JSONL objects."""
+    for path in paths or ["-"]:
+        f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("{"):
+                    yield json.loads(line)
+                else:
+                    yield {"url": line}
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+class Sink(ABC):
+    """Batch Writer of Feature Rows, with a fixed column order."""
+    requires: tuple[str, ...] = ()
+
+    def __init__(self, stream: IO[bytes], keys: list[str], feature_sets: list[Any]):
+        self.stream = stream
+        self.keys = keys
+        self.feature_sets = feature_sets
+
+    def __call__(self, rows: list[dict[str, Any]]) -> None:
+        self.write(rows)
+
+    @abstractmethod
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        ...
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class JSONLSink(Sink):
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        self.stream.write(
+            "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+        )
+
+
+class CSVSink(Sink):
+    def __init__(self, *args, **kwargs):
+        import csv
+        import io
+
+        super().__init__(*args, **kwargs)
+        self.buffer = io.StringIO()
+        self.writer = csv.DictWriter(self.buffer, fieldnames=self.keys, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        self.writer.writerows(rows)
+        self.stream.write(self.buffer.getvalue().encode())
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def close(self) -> None:
+        self.write([])
+        super().close()
+
+
+class ArrowSink(Sink):
+    """Arrow IPC Stream, typed from the Computed Field annotations."""
+    requires = ("pyarrow",)
+
+    def __init__(self, *args, **kwargs):
+        import pyarrow as pa
+        from lib.data.cache import return_type
+
+        super().__init__(*args, **kwargs)
+        self.pa = pa
+        types = {
+            key: return_type(info)
+            for feature_set in self.feature_sets for key, info in feature_set.model_computed_fields.items()
+        }
+        self.schema = pa.schema([(key, self.arrow_type(types[key])) for key in self.keys])
+        self.writer = pa.ipc.new_stream(self.stream, self.schema)
+
+    def arrow_type(self, annotation: Any) -> Any:
+        from typing import Union, get_args, get_origin
+
+        pa = self.pa
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if get_origin(annotation) is Union and len(args) == 1:
+            annotation = args[0]
+        if get_origin(annotation) is list:
+            return pa.list_(self.arrow_type(get_args(annotation)[0]))
+        return {bool: pa.bool_(), int: pa.int64(), float: pa.float64()}.get(annotation, pa.string())
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        columns = {}
+        for field in self.schema:
+            values = [row.get(field.name) for row in rows]
+            if field.type == self.pa.string():
+                values = [None if value is None else str(value) for value in values]
+            columns[field.name] = values
+        self.writer.write_batch(self.pa.RecordBatch.from_pydict(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+        super().close()
+
+
+class NpySink(Sink):
+    """Structured NumPy Array of the Numeric Features, NaN for nulls.
+
+    The row count goes in the `.npy` header, so records are spooled to a
+    temporary file as they come and copied after the header on close,
+    keeping memory bounded by the batch size.
+    """
+
+    def __init__(self, *args, **kwargs):
+        import tempfile
+        import numpy as np
+        from lib.data.cache import numeric_keys
+
+        super().__init__(*args, **kwargs)
+        numeric = set(numeric_keys(self.feature_sets))
+        self.keys = [key for key in self.keys if key in numeric]
+        self.dtype = np.dtype([(key, "f8") for key in self.keys])
+        self.spool = tempfile.TemporaryFile()
+        self.count = 0
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        import numpy as np
+
+        nan = float("nan")
+        records = np.array(
+            [tuple(nan if row.get(key) is None else float(row[key]) for key in self.keys) for row in rows],
+            dtype=self.dtype
+        )
+        self.spool.write(records.tobytes())
+        self.count += len(records)
+
+    def close(self) -> None:
+        import shutil
+        from numpy.lib import format
+
+        header = {"descr": format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": (self.count,)}
+        try:
+            format.write_array_header_1_0(self.stream, header)
+        except ValueError:
+            # Headers past 64 KiB, i.e. thousands of keys, need format 2.0.
+            format.write_array_header_2_0(self.stream, header)
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, self.stream)
+        self.spool.close()
+        super().close()
+
+
+SINKS = {"jsonl": JSONLSink, "csv": CSVSink, "arrow": ArrowSink, "npy": NpySink}
+
+
+def feature_sets_for(names: str) -> list[Any]:
+    import lib.features
+
+    unknown = set(names.split(",")) - set(FEATURE_SETS)
+    if unknown:
+        raise ValueError(f"Unknown feature sets {sorted(unknown)}, choose from {sorted(FEATURE_SETS)}.")
+    return [getattr(lib.features, FEATURE_SETS[name]) for name in names.split(",")]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m lib.cli", description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter, epilog="\n".join(__doc__.splitlines()[6:])
+    )
+    parser.add_argument("inputs", nargs="*", help="URL or JSONL files, stdin when omitted or '-'.")
+    parser.add_argument("-o", "--output", default="-", help="Output file, stdout by default.")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="jsonl")
+    parser.add_argument(
+        "--features", help=f"Comma-separated feature sets from {','.join(FEATURE_SETS)} "
+        "(default: lexical,header, or lexical with --offline)."
+    )
+    parser.add_argument("--fields", help="Comma-separated computed fields to project.")
+    parser.add_argument("--offline", action="store_true", help="Never touch the network.")
+    parser.add_argument("--workers", type=int, help="Compute processes (default: CPU count, 0 for in-process).")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent network probes.")
+    parser.add_argument("--batch", type=int, default=1000, help="Rows per output write.")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep repeated URLs.")
+    parser.add_argument("--cache", help="Feature store (SQLite) consulted before computing, and filled after.")
+    parser.add_argument("--cache-ttl", type=float, default=86_400, help="Seconds network-derived features stay cached.")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Feature store size cap in MiB.")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL, stream=sys.stderr)
+    feature_sets = feature_sets_for(args.features or ("lexical" if args.offline else "lexical,header"))
+
+    projection = args.fields.split(",") if args.fields else None
+    plan = Projection(
+        fields=projection or [key for feature_set in feature_sets for key in feature_set.model_computed_fields],
+        feature_sets=feature_sets
+    )
+    keys = [key for keys in plan.plan.values() for key in keys]
+
+    missing = [module for module in SINKS[args.format].requires if find_spec(module) is None]
+    if missing:
+        print(
+            f"error: the {args.format} format needs {', '.join(missing)}, "
+            f"install it with `pip install 'urlprint[{args.format}]'`.", file=sys.stderr
+        )
+        return 2
+    stream = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    sink = SINKS[args.format](stream, keys, list(plan.plan))
+    settings = dict(
+        source=read_items(args.inputs),
+        feature_sets=feature_sets,
+        projection=projection,
+        offline=args.offline,
+        probe_concurrency=args.concurrency,
+        sink_batch=args.batch,
+        sink=sink,
+    )
+    if args.workers is not None:
+        settings["compute_workers"] = args.workers
+    if args.no_dedup:
+        settings["dedup_window"] = 0
+    if args.cache:
+        settings.update(store_path=args.cache, store_ttl=args.cache_ttl, store_max_bytes=args.cache_size * 2 ** 20)
+    pipeline = Pipeline(**settings)
+    start = monotonic()
+    try:
+        counts = run(pipeline.run())
+        sink.close()
+    except BrokenPipeError:
+        # The reader went away, e.g. `| head`: stop quietly like other shell tools.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if stream is not sys.stdout.buffer:
+            stream.close()
+    elapsed = monotonic() - start
+    print(
+        f"{' '.join(f'{key}={value}' for key, value in counts.items())} "
+        f"elapsed={elapsed:.2f}s rate={counts['written'] / elapsed:.1f} urls/s",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import os
+import json
+import logging
+from hashlib import sha1
+from functools import cached_property
+from types import UnionType
+from typing import Any, Iterable, Optional, Union, get_args, get_origin, get_type_hints
+
+import numpy as np
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+from lib.features.base import FEATURE_VERSION, URLLabel
+
+
+CACHE_MAGIC = b"URLPRINT"
+CACHE_VERSION = 1
+HEADER_SIZE = 4096
+NUMERIC_TYPES = (bool, int, float)
+
+
+def return_type(info: Any) -> Any:
+    """Return Type of a Computed Field, read from its annotation while the model build is deferred."""
+    if info.return_type is not PydanticUndefined:
+        return info.return_type
+    prop = info.wrapped_property
+    return get_type_hints(getattr(prop, "func", None) or prop.fget).get("return")
+
+
+def numeric_keys(feature_sets: list[Any]) -> list[str]:
+    """Get the Numeric Computed Field Keys from Feature Sets."""
+    keys = []
+    for feature_set in feature_sets:
+        for key, info in feature_set.model_computed_fields.items():
+            annotation = return_type(info)
+            types = get_args(annotation) if get_origin(annotation) in (Union, UnionType) else (annotation,)
+            if all(t in NUMERIC_TYPES or t is type(None) for t in types):
+                keys.append(key)
+    return keys
+
+
+def schema_hash(keys: list[str]) -> str:
+    """Hash of a Feature Schema, used to invalidate stale caches."""
+    return sha1(
+        json.dumps([CACHE_VERSION, FEATURE_VERSION, keys, [label.value for label in URLLabel]]).encode()
+    ).hexdigest()
+
+
+class FeatureCache(BaseModel):
+    """Memory-Mapped Feature Tensor Cache.
+
+    File layout: a fixed size header block holding the magic bytes and a JSON
+    schema, followed by a float32 (rows x keys) feature matrix and an int8
+    label vector. Missing values are stored as NaN, missing labels as -1.
+    """
+    path: str
+    keys: list[str]
+
+    @cached_property
+    def schema(self) -> str:
+        return schema_hash(self.keys)
+
+    @cached_property
+    def header(self) -> Optional[dict[str, Any]]:
+        """Read the Cache Header, None if the File is missing or Corrupt."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                block = f.read(HEADER_SIZE)
+            if not block.startswith(CACHE_MAGIC):
+                return None
+            size = int.from_bytes(block[len(CACHE_MAGIC):len(CACHE_MAGIC) + 4], "little")
+            start = len(CACHE_MAGIC) + 4
+            return json.loads(block[start:start + size])
+        except Exception as e:
+            logging.error(f"Error reading feature cache {self.path}: {e}")
+            return None
+
+    @cached_property
+    def rows(self) -> int:
+        return self.header["rows"]
+
+    @cached_property
+    def capacity(self) -> int:
+        return self.header["capacity"]
+
+    @property
+    def is_valid(self) -> bool:
+        """Check the Cache exists and matches the current Feature Schema."""
+        return bool(self.header) and (
+            self.header.get("version") == CACHE_VERSION
+            and self.header.get("schema") == self.schema
+        )
+
+    @cached_property
+    def features(self) -> np.memmap:
+        return np.memmap(
+            self.path, dtype=np.float32, mode="c",
+            offset=HEADER_SIZE, shape=(self.capacity, len(self.keys))
+        )[:self.rows]
+
+    @cached_property
+    def labels(self) -> np.memmap:
+        return np.memmap(
+            self.path, dtype=np.int8, mode="c",
+            offset=HEADER_SIZE + self.capacity * len(self.keys) * 4, shape=(self.capacity,)
+        )[:self.rows]
+
+    @staticmethod
+    def encode_label(label: Optional[str]) -> int:
+        try:
+            return list(URLLabel).index(URLLabel(label))
+        except ValueError:
+            return -1
+
+    def _encode_header(self, rows: int, capacity: int) -> bytes:
+        header = json.dumps({
+            "version": CACHE_VERSION,
+            "schema": self.schema,
+            "keys": self.keys,
+            "labels": [label.value for label in URLLabel],
+            "rows": rows,
+            "capacity": capacity,
+        }).encode()
+        block = CACHE_MAGIC + len(header).to_bytes(4, "little") + header
+        if len(block) > HEADER_SIZE:
+            raise ValueError(f"Feature cache header exceeds {HEADER_SIZE} bytes.")
+        return block.ljust(HEADER_SIZE, b"\0")
+
+    def export(self, documents: Iterable[dict[str, Any]], rows: int) -> "FeatureCache":
+        """Encode Feature Documents into the Cache File."""
+        tmp = f"{self.path}.tmp"
+        cols = len(self.keys)
+        with open(tmp, "wb") as f:
+            f.write(self._encode_header(rows, rows))
+            f.truncate(HEADER_SIZE + rows * cols * 4 + rows)
+
+        features = np.memmap(tmp, dtype=np.float32, mode="r+", offset=HEADER_SIZE, shape=(rows, cols))
+        labels = np.memmap(tmp, dtype=np.int8, mode="r+", offset=HEADER_SIZE + rows * cols * 4, shape=(rows,))
+        written = 0
+        for document in documents:
+            if written == rows:
+                break
+            features[written] = [
+                np.nan if document.get(key) is None else float(document[key])
+                for key in self.keys
+            ]
+            labels[written] = self.encode_label(document.get("lx_label"))
+            written += 1
+        features.flush()
+        labels.flush()
+        del features, labels
+
+        if written != rows:
+            with open(tmp, "r+b") as f:
+                f.write(self._encode_header(written, rows))
+            logging.info(f"Feature cache expected {rows} rows but got {written}.")
+        os.replace(tmp, self.path)
+
+        for prop in ("header", "rows", "capacity", "features", "labels"):
+            self.__dict__.pop(prop, None)
+        return self
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, idx: Union[int, slice, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        """Features and Labels, zero-copy views for integer and slice indices, copies for
+        index arrays. The file is mapped copy-on-write, so views are writable (as
+        `torch.as_tensor` expects) and writes never reach the file."""
+        return self.features[idx], self.labels[idx]
@@ -1,6 +1,9 @@
 from functools import cached_property
+from typing import TYPE_CHECKING
 from pydantic_settings import BaseSettings
-from pymongo import MongoClient
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
 
 
 class Atlas(BaseSettings):
@@ -13,8 +16,10 @@ class Atlas(BaseSettings):
     def uri(self) -> str:
         return self.mongo_uri
     
-    @property
-    def client(self) -> MongoClient:
+    @cached_property
+    def client(self) -> "MongoClient":
+        from pymongo import MongoClient
+
         return MongoClient(self.uri)
 
     @property
@@ -0,0 +1,223 @@
+"""Distributed Extraction with Lease-Based Work Partitioning.
+
+The source is split into partitions, by line range or by host hash, tracked
+in a coordination collection. Workers on any number of machines claim a
+partition by taking a lease on it, heartbeat while they work on it, and mark
+it done at the end. Leases that expire because a worker died are reclaimed
+by the next worker that asks for work. Features are upserted by
+`lx_url_raw`, so a partition that is processed twice writes each URL once.
+
+    python -m lib.data.distributed plan
+    python -m lib.data.distributed work   # on every node, as many as needed
+"""
+import sys
+import logging
+from json import loads
+from zlib import crc32
+from threading import Event, Thread
+from functools import cached_property
+from datetime import datetime, timedelta, timezone
+from typing import Any, Generator, Literal, Optional
+
+from pydantic import PrivateAttr
+
+from lib.data.extract import FeatureExtractor
+from lib.data.vocab import CategoricalEncoder
+from lib.data.stats import FeatureStatistics
+from lib.features.base import URLComponent
+from lib.features.suffix import split_host
+
+
+class DistributedExtractor(FeatureExtractor):
+    mongo_coordination_collection: str = "extract_leases"
+    num_partitions: int = 64
+    partition_strategy: Literal["range", "host"] = "host"
+    lease_seconds: float = 60
+    heartbeat_seconds: float = 15
+    mongo_vocab_collection: Optional[str] = None
+    _partition: Optional[dict[str, Any]] = PrivateAttr(default=None)
+    _buckets: dict[int, list[list[str]]] = PrivateAttr(default_factory=dict)
+
+    @cached_property
+    def leases(self):
+        return self.atlas.database[self.mongo_coordination_collection]
+
+    @cached_property
+    def encoder(self) -> Optional[CategoricalEncoder]:
+        """Categorical Encoder whose Codes are shared by every Worker, None to keep strings only."""
+        if self.vocab_path is not None:
+            raise ValueError(
+                "A vocabulary file supports a single writer; set mongo_vocab_collection to encode across workers."
+            )
+        if self.mongo_vocab_collection is None:
+            return None
+        return CategoricalEncoder(
+            collection=self.atlas.database[self.mongo_vocab_collection], keep_strings=self.keep_categorical_strings
+        )
+
+    @cached_property
+    def stats(self) -> Optional[FeatureStatistics]:
+        """Streaming Statistics saved as this Worker's Partial State, None when not collected."""
+        if self.stats_path is not None:
+            raise ValueError(
+                "A stats file supports a single writer; set mongo_stats_collection to collect stats across workers."
+            )
+        return super().stats
+
+    @cached_property
+    def source_lines(self) -> list[str]:
+        from requests import get
+
+        return [line for line in get(self.aws_source).text.split("\n") if line.strip()]
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Registered Domain of a URL, so all of a site's hosts share a Partition."""
+        host = URLComponent._get_host(url).split(":")[0].lower()
+        return split_host(host).registered_domain or host
+
+    @classmethod
+    def host_partition(cls, url: str, num_partitions: int) -> int:
+        """Stable Partition of a URL's Host, the same on every worker."""
+        return crc32(cls.host_key(url).encode()) % num_partitions
+
+    def host_buckets(self, num_partitions: int) -> list[list[str]]:
+        """Source Lines by Host Partition, bucketed once per worker and Partition count."""
+        buckets = self._buckets.get(num_partitions)
+        if buckets is None:
+            buckets = [[] for _ in range(num_partitions)]
+            for line in self.source_lines:
+                buckets[self.host_partition(loads(line).get("url", ""), num_partitions)].append(line)
+            self._buckets[num_partitions] = buckets
+        return buckets
+
+    def plan_partitions(self) -> None:
+        """Create the Partitions, leaving existing ones and their state untouched."""
+        size = -(-len(self.source_lines) // self.num_partitions)
+        for partition in range(self.num_partitions):
+            bounds = {}
+            if self.partition_strategy == "range":
+                bounds = {"start": partition * size, "end": (partition + 1) * size}
+            self.leases.update_one(
+                {"_id": partition},
+                {"$setOnInsert": {
+                    "strategy": self.partition_strategy,
+                    "num_partitions": self.num_partitions,
+                    "status": "pending",
+                    "owner": None,
+                    "lease_expires": None,
+                    "attempts": 0,
+                    **bounds,
+                }},
+                upsert=True
+            )
+        self.atlas.collection.create_index("lx_url_raw", unique=True)
+
+    def claim(self) -> Optional[dict[str, Any]]:
+        """Lease a pending Partition, or one whose lease has expired."""
+        from pymongo import ReturnDocument
+
+        now = self.now()
+        return self.leases.find_one_and_update(
+            {"$or": [
+                {"status": "pending"},
+                {"status": "leased", "lease_expires": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": "leased",
+                    "owner": self.worker_id,
+                    "lease_expires": now + timedelta(seconds=self.lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("_id", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def heartbeat(self, partition: dict[str, Any], lost: Event, stop: Event) -> None:
+        """Extend the Lease until stopped, flagging a Lease taken over by another worker."""
+        while not stop.wait(self.heartbeat_seconds):
+            result = self.leases.update_one(
+                {"_id": partition["_id"], "owner": self.worker_id, "status": "leased"},
+                {"$set": {"lease_expires": self.now() + timedelta(seconds=self.lease_seconds)}}
+            )
+            if result.matched_count == 0:
+                logging.error(f"Lost lease on partition {partition['_id']}.")
+                lost.set()
+                return
+
+    def complete(self, partition: dict[str, Any]) -> bool:
+        result = self.leases.update_one(
+            {"_id": partition["_id"], "owner": self.worker_id, "status": "leased"},
+            {"$set": {"status": "done", "lease_expires": None, "done_at": self.now()}}
+        )
+        return result.matched_count == 1
+
+    def load_data(self) -> Generator[dict, None, None]:
+        """Load the Source Items of the currently leased Partition."""
+        yield from self.partition_data(self._partition)
+
+    def partition_data(self, partition: dict[str, Any]) -> Generator[dict, None, None]:
+        """Load the Source Items belonging to a Partition, as split when it was planned."""
+        if partition["strategy"] == "range":
+            lines = self.source_lines[partition["start"]:partition["end"]]
+        else:
+            lines = self.host_buckets(partition["num_partitions"])[partition["_id"]]
+        for line in lines:
+            yield loads(line)
+
+    def upsert(self, feature: dict[str, Any]) -> None:
+        """Write a Feature Document keyed by its raw URL, exactly once per URL."""
+        from pymongo.errors import DuplicateKeyError
+
+        key = {"lx_url_raw": feature["lx_url_raw"]}
+        try:
+            self.atlas.collection.replace_one(key, feature, upsert=True)
+        except DuplicateKeyError:
+            # Another worker inserted the URL between our match and insert.
+            self.atlas.collection.replace_one(key, feature)
+
+    def work(self) -> int:
+        """Process Partitions until none are left to claim, returning how many were completed."""
+        completed = 0
+        try:
+            completed = self._work()
+        finally:
+            self.persist()
+        return completed
+
+    def _work(self) -> int:
+        completed = 0
+        while (partition := self.claim()) is not None:
+            logging.info(f"Worker {self.worker_id} claimed partition {partition['_id']}.")
+            lost, stop = Event(), Event()
+            beat = Thread(target=self.heartbeat, args=(partition, lost, stop), daemon=True)
+            beat.start()
+            try:
+                self._partition = partition
+                for feature in self.load_features():
+                    if lost.is_set():
+                        break
+                    self.upsert(feature)
+            finally:
+                stop.set()
+                beat.join()
+            if not lost.is_set() and self.complete(partition):
+                completed += 1
+        return completed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    extractor = DistributedExtractor()
+    if sys.argv[1:] == ["plan"]:
+        extractor.plan_partitions()
+    elif sys.argv[1:] == ["work"]:
+        print(f"Worker {extractor.worker_id} completed {extractor.work()} partitions.")
+    else:
+        sys.exit("usage: python -m lib.data.distributed plan|work")
@@ -1,16 +1,20 @@
-import logging
-from requests import get
+import os
+import socket
 from json import loads
 from functools import reduce, cached_property
-from typing import Any, Generator, TypeVar
+from typing import Any, Generator, Optional, TypeVar
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 from lib.features.base import Feature, URLComponent
 from lib.features.lexical import LexicalFeatures 
 from lib.features.header import HeaderFeatures
+from lib.features.graph import Projection
 
 from lib.data.db import Atlas
+from lib.data.vocab import CategoricalEncoder
+from lib.data.stats import FeatureStatistics
 
 FI = TypeVar("FI", bound=Feature)
 
@@ -19,6 +23,13 @@ class FeatureExtractor(BaseSettings):
     mongo_extract_database: str
     mongo_extract_collection: str
     feature_sets: list[Any] = [LexicalFeatures, HeaderFeatures]
+    projection: Optional[list[str]] = None
+    vocab_path: Optional[str] = None
+    keep_categorical_strings: bool = True
+    stats_path: Optional[str] = None
+    mongo_stats_collection: Optional[str] = None
+    store_path: Optional[str] = None
+    worker_id: str = Field(default_factory=lambda: f"{socket.gethostname()}-{os.getpid()}")
 
     @cached_property
     def atlas(self):
@@ -28,9 +39,37 @@ class FeatureExtractor(BaseSettings):
         )
     
 
+    @cached_property
+    def encoder(self) -> Optional[CategoricalEncoder]:
+        """Categorical Encoder backed by a persistent Vocabulary, None to keep strings only."""
+        if self.vocab_path is None:
+            return None
+        return CategoricalEncoder(path=self.vocab_path, keep_strings=self.keep_categorical_strings)
+
+    @cached_property
+    def stats(self) -> Optional[FeatureStatistics]:
+        """Streaming Statistics of the Numeric Features, None when not persisted anywhere."""
+        from lib.data.cache import numeric_keys
+
+        if self.stats_path is None and self.mongo_stats_collection is None:
+            return None
+        keys = [key for key in numeric_keys(self.feature_sets) if key in self.feature_keys]
+        if self.stats_path is not None:
+            return FeatureStatistics.load(self.stats_path, keys)
+        return FeatureStatistics(keys=keys)
+
+    @cached_property
+    def plan(self) -> Optional[Projection]:
+        """Projected Fields and the Network Fetches they need, None to extract all."""
+        if self.projection is None:
+            return None
+        return Projection(fields=self.projection, feature_sets=self.feature_sets)
+
     @cached_property
     def feature_keys(self) -> list[str]:
         """Get Feature Keys from Features."""
+        if self.plan is not None:
+            return reduce(lambda a, b: a + b, self.plan.plan.values(), [])
         return reduce(
             lambda a, b: a + b, list(
                 map(
@@ -41,24 +80,29 @@ class FeatureExtractor(BaseSettings):
     
     
     @staticmethod
-    def extract_features(feature_sets:list[FI]) -> dict[str, Any]:
-        """Get Features from Feature Instances."""
+    def extract_features(feature_sets:list[FI], projection:Optional[list[str]]=None) -> dict[str, Any]:
+        """Get Features from Feature Instances, only the projected ones if given."""
         return reduce(
             lambda a, b: dict(a, **b), list(
                 map(
                     lambda feature_set: dict(
                         map(
                             lambda feature: (feature, getattr(feature_set, feature)),
-                            feature_set.model_computed_fields.keys()
+                            filter(
+                                lambda feature: projection is None or feature in projection,
+                                feature_set.model_computed_fields.keys()
+                            )
                         )
                     ), feature_sets
                 )
-            )
+            ), {}
         )
 
 
     def load_data(self) -> Generator[dict, None, None]:
         """Load Data from Source."""
+        from requests import get
+
         lines = get(self.aws_source).text.split("\n")
         for line in lines:
             yield loads(line)
@@ -70,19 +114,82 @@ class FeatureExtractor(BaseSettings):
                 print(f"URL {obj.get('url')} already exists in database.")
                 continue
 
+            feature_sets = self.feature_sets if self.plan is None else list(self.plan.plan)
+            components = URLComponent(**obj, offline=self.plan is not None and self.plan.offline)
             yield list(
                 map(
-                    lambda feature: feature(components=URLComponent(**obj)), self.feature_sets
+                    lambda feature: feature(components=components), feature_sets
                 )
             )
 
     def load_features(self) -> Generator[dict, None, None]:
         """Get Features from Feature Instances."""
         for feature_instance in self.load_feature_sets():
-            yield self.extract_features(feature_instance)
+            features = self.extract_features(feature_instance, self.projection)
+            self.observe(features)
+            if self.encoder is not None:
+                features = self.encoder.encode(features)
+                self.encoder.checkpoint()
+            yield features
+
+
+    def existing(self, urls:list[str]) -> set[str]:
+        """Raw URLs already in the Database, one query per batch."""
+        return set(
+            map(
+                lambda doc: doc["lx_url_raw"],
+                self.atlas.collection.find({"lx_url_raw": {"$in": urls}}, {"lx_url_raw": 1})
+            )
+        )
+
+    def observe(self, features:dict[str, Any]) -> None:
+        if self.stats is not None:
+            self.stats.update(features)
+
+    def persist(self) -> None:
+        """Save the Vocabularies and Feature Statistics."""
+        if self.encoder is not None:
+            self.encoder.save()
+        if self.stats is None:
+            return
+        if self.stats_path is not None:
+            self.stats.save(self.stats_path)
+        if self.mongo_stats_collection is not None:
+            self.stats.save_partial(self.atlas.database[self.mongo_stats_collection], self.worker_id)
+
+    def write(self, features:list[dict[str, Any]]) -> None:
+        """Write a Batch of Features to the Database."""
+        for feature in features:
+            self.observe(feature)
+        if self.encoder is not None:
+            features = list(map(self.encoder.encode, features))
+            self.encoder.checkpoint()
+        self.atlas.collection.insert_many(features, ordered=False)
+
+    def pipeline(self, **settings) -> "Pipeline":
+        """Staged Pipeline from the Source to the Database."""
+        from lib.data.pipeline import Pipeline
+
+        return Pipeline(
+            source=self.load_data(),
+            feature_sets=self.feature_sets,
+            projection=self.projection,
+            existing=self.existing,
+            sink=self.write,
+            **{"store_path": self.store_path, **settings}
+        )
 
+    async def run(self, **settings) -> None:
+        """Save Features to Database through the Staged Pipeline."""
+        try:
+            await self.pipeline(**settings).run()
+        finally:
+            self.persist()
 
     async def save(self) -> None:
         """Save Features to Database."""
-        for feature in self.load_features():
-            self.atlas.collection.insert_one(feature)
+        try:
+            for feature in self.load_features():
+                self.atlas.collection.insert_one(feature)
+        finally:
+            self.persist()
@@ -1,12 +1,15 @@
 from pydantic import Field
 from functools import cached_property
-from typing import Annotated
+from typing import Annotated, Any, Optional
 from pydantic_settings import BaseSettings
 
+import numpy as np
 from random import sample
-from torch.utils.data import Dataset
 
 from lib.data.db import Atlas
+from lib.data.cache import FeatureCache, numeric_keys
+from lib.data.sampler import StratifiedSampler
+from lib.features import LexicalFeatures, HeaderFeatures
 
 TrainSize = Annotated[float, Field(default=0.8, ge=1, le=0)]
 
@@ -22,10 +25,37 @@ class URI(BaseSettings):
         return Atlas(mongo_database=self.mongo_load_database, mongo_collection=self.mongo_load_collection)
 
 
-class URLDataset(Dataset):
-    def __init__(self, train_size:TrainSize=0.8, uri=URI()):
+def __getattr__(name:str):
+    """Build `URLDataset` on first access, so importing this module does not import torch."""
+    if name != "URLDataset":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from torch.utils.data import Dataset
+
+    cls = type("URLDataset", (_URLDataset, Dataset), {"__module__": __name__, "__doc__": _URLDataset.__doc__})
+    globals()[name] = cls
+    return cls
+
+
+class _URLDataset:
+    """URL Feature Dataset, a `torch.utils.data.Dataset` once built as `URLDataset`."""
+    def __init__(
+            self, train_size:TrainSize=0.8, uri:Optional[URI]=None,
+            cache_path:Optional[str]=None, feature_sets:list[Any]=[LexicalFeatures, HeaderFeatures]
+        ):
         self.train_size = train_size
-        self.uri = uri
+        self.uri = URI() if uri is None else uri
+        self.cache_path = cache_path
+        self.feature_sets = feature_sets
+
+    @cached_property
+    def cache(self) -> Optional[FeatureCache]:
+        """Memory-Mapped Feature Cache, exported on first use or Schema change."""
+        if self.cache_path is None:
+            return None
+        cache = FeatureCache(path=self.cache_path, keys=numeric_keys(self.feature_sets))
+        if not cache.is_valid:
+            self.__export__(cache)
+        return cache
 
     @cached_property
     def __all__(self):
@@ -35,18 +65,40 @@ class URLDataset(Dataset):
     def __ids__(self):
         return list(self.uri.atlas.collection.find({}, {"_id": 1}))
 
-    @cached_property
     def __len__(self):
+        if self.cache is not None:
+            return len(self.cache)
         return self.uri.atlas.collection.count_documents({})
     
     def __sample__(self):
         return self.uri.atlas.collection.aggregate([{"$sample": {"size": 1}}])
+
+    def sampler(self, **settings) -> StratifiedSampler:
+        """Label-Stratified Sampler over the Collection, see `StratifiedSampler`."""
+        return StratifiedSampler(collection=self.uri.atlas.collection, **settings)
     
     def __getitem__(self, idx):
+        """Features and Label of a Row, zero-copy views of the copy-on-write Cache."""
+        if self.cache is not None:
+            return self.cache[idx]
         return self.__all__[idx]
+
+    def __getitems__(self, indices:list[int]):
+        """Batched Indexing, a single fancy-index over the Cache. Returns a list
+        of (features, label) samples for `collate_fn`, as torch's fetcher expects;
+        fancy-indexing copies, so the arrays are writable."""
+        if self.cache is not None:
+            features, labels = self.cache[np.asarray(indices)]
+            return list(zip(features, labels))
+        return [self.__all__[idx] for idx in indices]
+
+    def __export__(self, cache:FeatureCache) -> FeatureCache:
+        projection = dict.fromkeys(cache.keys + ["lx_label"], 1)
+        documents = self.uri.atlas.collection.find({}, projection)
+        return cache.export(documents, self.uri.atlas.collection.count_documents({}))
     
     def __download__(self):
-        train = sample(self.__all__, round(self.__len__ * self.train_size))
+        train = sample(self.__all__, round(len(self.__all__) * self.train_size))
         test = self.uri.atlas.database['urls'].find({"_id": {"$nin": [i["_id"] for i in train]}})
         return train, list(test)
     
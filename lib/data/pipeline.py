@@ -0,0 +1,292 @@
+"""Staged Producer/Consumer Extraction Pipeline.
+
+    read -> dedup -> probe -> compute -> sink
+              `-- feature store hits --^
+
+Stages run concurrently and are connected by bounded queues, so a slow
+stage applies backpressure upstream instead of letting memory grow. Network
+probes run on a thread pool, feature computation on a process pool and
+writes are batched. With a `store_path`, vectors found in the feature store
+skip the probe and compute stages, and computed ones are added to it.
+SIGTERM/SIGINT stop the reader; everything already read is drained through
+the remaining stages before `run` returns.
+"""
+import os
+import signal
+import multiprocessing
+import logging
+from time import monotonic
+from asyncio import (
+    Event, Queue, QueueEmpty, gather, get_running_loop, to_thread, wait_for,
+    TimeoutError as AsyncTimeoutError
+)
+from collections import Counter, OrderedDict
+from itertools import islice
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cached_property
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+from lib.features.base import Feature, URLComponent
+from lib.features.graph import Projection
+
+
+DONE = None
+
+
+def _extract(batch: list[list[Feature]], projection: Optional[list[str]]) -> list[Optional[dict[str, Any]]]:
+    """Extract the Features of a batch of items in a worker process, None for failed items."""
+    from lib.data.extract import FeatureExtractor
+
+    results = []
+    for feature_sets in batch:
+        try:
+            results.append(FeatureExtractor.extract_features(feature_sets, projection))
+        except Exception as e:
+            logging.error(f"Pipeline error: {e}")
+            results.append(None)
+    return results
+
+
+class Pipeline(BaseModel):
+    """Bounded-Queue Extraction Pipeline with per-stage concurrency."""
+    class Config:
+        arbitrary_types_allowed = True
+
+    source: Iterable[dict[str, Any]]
+    feature_sets: list[Any]
+    sink: Callable[[list[dict[str, Any]]], None]
+    existing: Optional[Callable[[list[str]], set[str]]] = None
+    projection: Optional[list[str]] = None
+    offline: bool = False
+    queue_size: int = 1024
+    dedup_batch: int = 256
+    dedup_window: int = 1_000_000
+    probe_concurrency: int = 64
+    compute_workers: int = os.cpu_count() or 1
+    compute_batch: int = 64
+    sink_batch: int = 500
+    sink_interval: float = 1.0
+    store_path: Optional[str] = None
+    store_ttl: float = 86_400
+    store_max_bytes: int = 2 ** 30
+    _stop: Event = PrivateAttr(default_factory=Event)
+
+    @cached_property
+    def counts(self) -> Counter:
+        return Counter()
+
+    @cached_property
+    def plan(self) -> Projection:
+        fields = self.projection or [
+            key for feature_set in self.feature_sets for key in feature_set.model_computed_fields
+        ]
+        return Projection(fields=fields, feature_sets=self.feature_sets)
+
+    @cached_property
+    def store(self) -> Optional["FeatureStore"]:
+        """Persistent Feature Vector Store consulted before any computation, None to always compute."""
+        from lib.data.store import FeatureStore
+
+        if self.store_path is None:
+            return None
+        return FeatureStore(
+            path=self.store_path,
+            feature_sets=list(self.plan.plan),
+            fields=[key for keys in self.plan.plan.values() for key in keys],
+            offline=self.offline or self.plan.offline,
+            ttl=self.store_ttl,
+            max_bytes=self.store_max_bytes,
+        )
+
+    @cached_property
+    def probe_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.probe_concurrency)
+
+    @cached_property
+    def compute_executor(self) -> Executor:
+        if self.compute_workers > 0:
+            # Probe and to_thread workers are already running when the pool starts:
+            # forking this multi-threaded process could deadlock the children.
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            context = multiprocessing.get_context(method)
+            if method == "forkserver":
+                context.set_forkserver_preload(["lib.data.extract"])
+            return ProcessPoolExecutor(max_workers=self.compute_workers, mp_context=context)
+        return ThreadPoolExecutor(max_workers=1)
+
+    def stop(self) -> None:
+        """Stop reading new items and drain the ones in flight."""
+        self._stop.set()
+
+    async def _stage(
+            self, fn: Callable[[Any], Awaitable[Any]], inbox: Queue, outbox: Optional[Queue], workers: int,
+            batch: Optional[int] = None
+        ) -> None:
+        """Run `fn` on every item. With `batch`, `fn` maps a list of up to
+        `batch` already-queued items to a list of results instead."""
+        async def worker():
+            done = False
+            while not done and (item := await inbox.get()) is not DONE:
+                items = [item]
+                while batch and len(items) < batch:
+                    try:
+                        item = inbox.get_nowait()
+                    except QueueEmpty:
+                        break
+                    if item is DONE:
+                        done = True
+                        break
+                    items.append(item)
+                try:
+                    results = await fn(items) if batch else [await fn(item)]
+                except Exception as e:
+                    self.counts["errors"] += len(items)
+                    logging.error(f"Pipeline error: {e}")
+                    continue
+                for result in results:
+                    if result is not None and outbox is not None:
+                        await outbox.put(result)
+            await inbox.put(DONE)
+
+        await gather(*[worker() for _ in range(workers)])
+        if outbox is not None:
+            await outbox.put(DONE)
+
+    async def read(self, outbox: Queue) -> None:
+        """Read the Source in chunks, one thread hop per `dedup_batch` items."""
+        iterator: Iterator = iter(self.source)
+        while not self._stop.is_set():
+            chunk = await to_thread(list, islice(iterator, self.dedup_batch))
+            if not chunk:
+                break
+            for obj in chunk:
+                self.counts["read"] += 1
+                await outbox.put(obj)
+        await outbox.put(DONE)
+
+    async def dedup(self, inbox: Queue, outbox: Queue, sink: Queue) -> None:
+        """Drop URLs seen recently in the run or already stored, one lookup per batch.
+        URLs in the feature store go straight to the `sink` queue."""
+        seen, done = OrderedDict(), False
+        while not done:
+            batch = []
+            while len(batch) < self.dedup_batch:
+                try:
+                    obj = inbox.get_nowait() if batch else await inbox.get()
+                except QueueEmpty:
+                    break
+                if obj is DONE:
+                    done = True
+                    break
+                if obj.get("url") in seen:
+                    self.counts["skipped"] += 1
+                    continue
+                seen[obj.get("url")] = None
+                if len(seen) > self.dedup_window:
+                    seen.popitem(last=False)
+                batch.append(obj)
+            stored = set()
+            if batch and self.existing is not None:
+                stored = await to_thread(self.existing, [obj.get("url") for obj in batch])
+            self.counts["skipped"] += sum(obj.get("url") in stored for obj in batch)
+            batch = [obj for obj in batch if obj.get("url") not in stored]
+            cached = [None] * len(batch)
+            if batch and self.store is not None:
+                try:
+                    cached = await to_thread(self.store.get_many, [obj.get("url") for obj in batch])
+                except Exception as e:
+                    logging.error(f"Feature store error: {e}")
+            for obj, features in zip(batch, cached):
+                if features is None:
+                    await outbox.put(obj)
+                    continue
+                self.counts["cached"] += 1
+                await sink.put(self.store.complete(obj, features))
+        await outbox.put(DONE)
+
+    async def probe(self, obj: dict[str, Any]) -> list[Feature]:
+        """Build Feature Instances and run the Network Fetches they need."""
+        loop = get_running_loop()
+        offline = self.offline or self.plan.offline
+        components = URLComponent(**obj, offline=offline)
+        feature_sets = [feature_set(components=components) for feature_set in self.plan.plan]
+        if not offline and "probe" in self.plan.needs:
+            await loop.run_in_executor(self.probe_executor, getattr, components, "cp_digest")
+        if not offline and "certificate" in self.plan.needs:
+            for feature_set in feature_sets:
+                if "certificate" in type(feature_set).__dict__:
+                    await loop.run_in_executor(self.probe_executor, getattr, feature_set, "certificate")
+        self.counts["probed"] += 1
+        return feature_sets
+
+    async def compute(self, batch: list[list[Feature]]) -> list[Optional[dict[str, Any]]]:
+        """Extract Features of a batch in one executor call, amortizing the process hop."""
+        loop = get_running_loop()
+        features = await loop.run_in_executor(
+            self.compute_executor, _extract, batch, self.projection
+        )
+        computed = sum(result is not None for result in features)
+        self.counts["computed"] += computed
+        self.counts["errors"] += len(features) - computed
+        if self.store is not None and computed:
+            items = [
+                (feature_sets[0].components.url, result)
+                for feature_sets, result in zip(batch, features) if result is not None and feature_sets
+            ]
+            await to_thread(self.store.put_many, items)
+        return features
+
+    async def write(self, inbox: Queue) -> None:
+        """Write Features in batches of `sink_batch`, or every `sink_interval` seconds."""
+        batch, done, flushed = [], False, monotonic()
+        while not done:
+            try:
+                item = await wait_for(inbox.get(), self.sink_interval)
+                if item is DONE:
+                    done = True
+                else:
+                    batch.append(item)
+            except AsyncTimeoutError:
+                pass
+            if batch and (done or len(batch) >= self.sink_batch or monotonic() - flushed >= self.sink_interval):
+                try:
+                    await to_thread(self.sink, batch)
+                    self.counts["written"] += len(batch)
+                except Exception as e:
+                    # e.g. a BulkWriteError on duplicates: the rest of the batch may have been written.
+                    written = (getattr(e, "details", None) or {}).get("nInserted", 0)
+                    self.counts["written"] += written
+                    self.counts["sink_errors"] += len(batch) - written
+                    logging.error(f"Sink error: {e}")
+                batch, flushed = [], monotonic()
+
+    async def run(self) -> Counter:
+        """Run the Pipeline to completion, returning per-stage counts."""
+        loop = get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        read, probe, compute, sink = (Queue(self.queue_size) for _ in range(4))
+        try:
+            await gather(
+                self.read(read),
+                self.dedup(read, probe, sink),
+                self._stage(self.probe, probe, compute, self.probe_concurrency),
+                self._stage(self.compute, compute, sink, max(self.compute_workers, 1), self.compute_batch),
+                self.write(sink),
+            )
+        finally:
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            self.probe_executor.shutdown(wait=False)
+            self.compute_executor.shutdown()
+        logging.info(f"Pipeline finished: {dict(self.counts)}")
+        return self.counts
@@ -0,0 +1,130 @@
+"""Label-Stratified Sampling over a Feature Collection.
+
+Per-label `_id` indexes are built in one streaming pass over the collection,
+optionally capped per label with reservoir sampling so a fixed-size subset
+never needs the whole collection in memory, or drawn server-side with one
+`$sample` per label. Mini-batches follow configurable class ratios, and each
+batch is fetched with a single `$in` query.
+"""
+import logging
+from random import Random
+from collections import Counter
+from functools import cached_property
+from typing import Any, Generator, Iterator, Optional
+
+from pydantic import BaseModel
+
+
+class StratifiedSampler(BaseModel):
+    """Per-Label Index of Document Ids with ratio-controlled Batch Sampling."""
+    class Config:
+        arbitrary_types_allowed = True
+
+    collection: Any
+    label_field: str = "lx_label"
+    ratios: Optional[dict[str, float]] = None
+    per_label: Optional[int] = None
+    server_side: bool = False
+    scan_batch: int = 10_000
+    seed: Optional[int] = None
+
+    @cached_property
+    def rng(self) -> Random:
+        return Random(self.seed)
+
+    @cached_property
+    def labels(self) -> list[str]:
+        if self.ratios is not None:
+            return [label for label, ratio in self.ratios.items() if ratio > 0]
+        return sorted(label for label in self.collection.distinct(self.label_field) if label is not None)
+
+    @cached_property
+    def index(self) -> dict[str, list[Any]]:
+        """Document Ids per Label."""
+        index = self._sample_index() if self.server_side else self._scan_index()
+        logging.info(f"Indexed {', '.join(f'{label}={len(ids)}' for label, ids in index.items())}.")
+        return index
+
+    def _scan_index(self) -> dict[str, list[Any]]:
+        """One streaming pass, keeping at most `per_label` ids per label by reservoir sampling."""
+        index, seen = {label: [] for label in self.labels}, Counter()
+        cursor = self.collection.find(
+            {self.label_field: {"$in": self.labels}}, {"_id": 1, self.label_field: 1}
+        ).batch_size(self.scan_batch)
+        for document in cursor:
+            label = document[self.label_field]
+            seen[label] += 1
+            reservoir = index[label]
+            if self.per_label is None or len(reservoir) < self.per_label:
+                reservoir.append(document["_id"])
+            elif (j := self.rng.randrange(seen[label])) < self.per_label:
+                reservoir[j] = document["_id"]
+        return index
+
+    def _sample_index(self) -> dict[str, list[Any]]:
+        """One server-side `$sample` of `per_label` ids per label."""
+        if self.per_label is None:
+            raise ValueError("server_side sampling needs per_label.")
+        return {
+            label: [
+                document["_id"] for document in self.collection.aggregate([
+                    {"$match": {self.label_field: label}},
+                    {"$sample": {"size": self.per_label}},
+                    {"$project": {"_id": 1}},
+                ], allowDiskUse=True)
+            ]
+            for label in self.labels
+        }
+
+    def counts(self, batch_size: int) -> dict[str, int]:
+        """Samples per Label in a Batch, by largest remainder over the class ratios."""
+        labels = [label for label in self.labels if self.index[label]]
+        if not labels:
+            return {}
+        weights = {label: (self.ratios or {}).get(label, 1.0) for label in labels}
+        total = sum(weights.values())
+        exact = {label: batch_size * weight / total for label, weight in weights.items()}
+        counts = {label: int(share) for label, share in exact.items()}
+        remainder = sorted(labels, key=lambda label: exact[label] - counts[label], reverse=True)
+        for label in remainder[:batch_size - sum(counts.values())]:
+            counts[label] += 1
+        return counts
+
+    def _cycle(self, ids: list[Any]) -> Iterator[Any]:
+        """Endless Stream of a Label's ids, reshuffled on every pass, so minority labels are oversampled."""
+        ids = list(ids)
+        while True:
+            self.rng.shuffle(ids)
+            yield from ids
+
+    def batches(self, batch_size: int, num_batches: Optional[int] = None) -> Generator[list[Any], None, None]:
+        """Batches of Document Ids following the class ratios.
+
+        One epoch, i.e. as many batches as the index holds ids, unless `num_batches` is given.
+        """
+        counts = self.counts(batch_size)
+        streams = {label: self._cycle(self.index[label]) for label in counts}
+        if num_batches is None:
+            num_batches = -(-sum(len(ids) for ids in self.index.values()) // batch_size)
+        for _ in range(num_batches):
+            batch = [next(streams[label]) for label, count in counts.items() for _ in range(count)]
+            self.rng.shuffle(batch)
+            yield batch
+
+    def fetch(self, ids: list[Any], projection: Optional[dict[str, int]] = None) -> list[dict[str, Any]]:
+        """Documents of a Batch in one `$in` query, in batch order (repeats included)."""
+        documents = {
+            document["_id"]: document
+            for document in self.collection.find({"_id": {"$in": list(set(ids))}}, projection or {"raw": 0})
+        }
+        return [documents[_id] for _id in ids if _id in documents]
+
+    def __iter__(self) -> Iterator[list[Any]]:
+        return self.batches(batch_size=256)
+
+    def load(
+            self, batch_size: int, num_batches: Optional[int] = None, projection: Optional[dict[str, int]] = None
+        ) -> Generator[list[dict[str, Any]], None, None]:
+        """Balanced Mini-Batches of Documents."""
+        for ids in self.batches(batch_size, num_batches):
+            yield self.fetch(ids, projection)
@@ -0,0 +1,248 @@
+"""Incremental Feature Statistics.
+
+Statistics of every numeric computed field are updated as documents are
+produced: Welford mean and variance, min/max, null counts and quantiles
+from a log-bucketed sketch with bounded relative error (as in DDSketch).
+Every statistic is kept overall and per label. Partial states from
+parallel workers merge exactly, apart from the sketch's relative error, so
+normalization parameters are available without a second pass over the data.
+"""
+import os
+import json
+import logging
+from functools import cached_property
+from math import ceil, log, sqrt
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel
+
+
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+class Moments(BaseModel):
+    """Streaming Count, Mean, Variance, Min and Max (Welford, merged per Chan et al.)."""
+    count: int = 0
+    nulls: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+    def update(self, value: Optional[float]) -> None:
+        # Runs once per field per document: fields are updated in `__dict__`
+        # directly, skipping pydantic's `__setattr__`.
+        state = self.__dict__
+        if value is None:
+            state["nulls"] += 1
+            return
+        state["count"] = count = state["count"] + 1
+        delta = value - state["mean"]
+        state["mean"] = mean = state["mean"] + delta / count
+        state["m2"] += delta * (value - mean)
+        if state["min"] is None or value < state["min"]:
+            state["min"] = value
+        if state["max"] is None or value > state["max"]:
+            state["max"] = value
+
+    def merge(self, other: "Moments") -> None:
+        count = self.count + other.count
+        if other.count:
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.count = count
+        self.nulls += other.nulls
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def null_rate(self) -> Optional[float]:
+        total = self.count + self.nulls
+        return self.nulls / total if total else None
+
+
+class QuantileSketch(BaseModel):
+    """Log-Bucketed Quantile Sketch with `relative_accuracy` error on every quantile.
+
+    Buckets are keyed by string so the state stores as-is in JSON and MongoDB.
+    Past `max_buckets`, the lowest buckets of a sign are collapsed together.
+    """
+    relative_accuracy: float = 0.01
+    max_buckets: int = 2048
+    positive: dict[str, int] = {}
+    negative: dict[str, int] = {}
+    zeros: int = 0
+
+    @property
+    def gamma(self) -> float:
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    @cached_property
+    def log_gamma(self) -> float:
+        return log(self.gamma)
+
+    def _bucket(self, value: float) -> str:
+        return str(ceil(log(value) / self.log_gamma))
+
+    def _value(self, bucket: str) -> float:
+        return 2 * self.gamma ** int(bucket) / (self.gamma + 1)
+
+    def _collapse(self, buckets: dict[str, int]) -> None:
+        while len(buckets) > self.max_buckets:
+            lowest, second = sorted(buckets, key=int)[:2]
+            buckets[second] += buckets.pop(lowest)
+
+    def update(self, value: float) -> None:
+        if value > 0:
+            key = self._bucket(value)
+            self.positive[key] = self.positive.get(key, 0) + 1
+            self._collapse(self.positive)
+        elif value < 0:
+            key = self._bucket(-value)
+            self.negative[key] = self.negative.get(key, 0) + 1
+            self._collapse(self.negative)
+        else:
+            self.__dict__["zeros"] += 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+            self._collapse(mine)
+        self.zeros += other.zeros
+
+    @property
+    def count(self) -> int:
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zeros
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank, seen = q * (self.count - 1), 0
+        for key in sorted(self.negative, key=int, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive, key=int):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive, key=int))
+
+
+class FieldStats(BaseModel):
+    """Moments and Quantiles of one Feature Field."""
+    moments: Moments = Moments()
+    sketch: QuantileSketch = QuantileSketch()
+
+    def update(self, value: Optional[Any]) -> None:
+        if value is not None:
+            value = float(value)
+            self.sketch.update(value)
+        self.moments.update(value)
+
+    def merge(self, other: "FieldStats") -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+    def summary(self) -> dict[str, Optional[float]]:
+        """Normalization Parameters of the Field."""
+        variance = self.moments.variance
+        return {
+            "count": self.moments.count,
+            "null_rate": self.moments.null_rate,
+            "mean": self.moments.mean if self.moments.count else None,
+            "std": sqrt(variance) if variance is not None else None,
+            "min": self.moments.min,
+            "max": self.moments.max,
+            **{f"p{round(q * 100):02d}": self.sketch.quantile(q) for q in QUANTILES},
+        }
+
+
+class FeatureStatistics(BaseModel):
+    """Overall and Per-Label Statistics of Numeric Feature Fields."""
+    keys: list[str]
+    label_key: str = "lx_label"
+    documents: int = 0
+    overall: dict[str, FieldStats] = {}
+    by_label: dict[str, dict[str, FieldStats]] = {}
+
+    def update(self, features: dict[str, Any]) -> None:
+        """Add a Feature Document."""
+        self.documents += 1
+        label = features.get(self.label_key)
+        per_label = None if label is None else self.by_label.setdefault(str(label), {})
+        for key in self.keys:
+            if key not in features:
+                continue
+            for fields in (self.overall, per_label):
+                if fields is None:
+                    continue
+                if key not in fields:
+                    fields[key] = FieldStats()
+                fields[key].update(features[key])
+
+    def merge(self, other: "FeatureStatistics") -> "FeatureStatistics":
+        """Merge another Partial State into this one."""
+        self.documents += other.documents
+        for mine, theirs in [(self.overall, other.overall)] + [
+            (self.by_label.setdefault(label, {}), stats) for label, stats in other.by_label.items()
+        ]:
+            for key, field_stats in theirs.items():
+                if key not in mine:
+                    mine[key] = FieldStats()
+                mine[key].merge(field_stats)
+        self.keys = list(dict.fromkeys(self.keys + other.keys))
+        return self
+
+    def summary(self) -> dict[str, Any]:
+        """Normalization Parameters, overall and per label."""
+        return {
+            "documents": self.documents,
+            "overall": {key: stats.summary() for key, stats in self.overall.items()},
+            "by_label": {
+                label: {key: stats.summary() for key, stats in fields.items()}
+                for label, fields in self.by_label.items()
+            },
+        }
+
+    @classmethod
+    def load(cls, path: str, keys: list[str]) -> "FeatureStatistics":
+        """Stored State of a Stats File, or an empty one."""
+        if not os.path.exists(path):
+            return cls(keys=keys)
+        try:
+            with open(path) as f:
+                stored = cls(**json.load(f))
+        except Exception as e:
+            logging.error(f"Error reading feature statistics {path}: {e}")
+            raise
+        return cls(keys=keys).merge(stored)
+
+    def save(self, path: str) -> None:
+        """Persist the State atomically."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.model_dump(), f)
+        os.replace(tmp, path)
+
+    def save_partial(self, collection, worker_id: str) -> None:
+        """Persist this Worker's Partial State to a Stats Collection."""
+        collection.replace_one({"_id": worker_id}, {"_id": worker_id, **self.model_dump()}, upsert=True)
+
+    @classmethod
+    def combine(cls, partials: Iterable[dict[str, Any]], keys: Optional[list[str]] = None) -> "FeatureStatistics":
+        """Merge the Partial States of all Workers, e.g. `combine(collection.find())`."""
+        combined = cls(keys=keys or [])
+        for partial in partials:
+            partial.pop("_id", None)
+            combined.merge(cls(**partial))
+        return combined
@@ -0,0 +1,318 @@
+"""Persistent Content-Addressed Feature Store.
+
+Computed feature vectors are kept in a local SQLite database in WAL mode,
+so any number of worker processes can read it concurrently while one
+writes. Fields are split by what they depend on:
+
+- network fields, which need a probe or certificate fetch, expire after
+  `ttl`. Those that only depend on the fetched response (most `hd_*`
+  fields) are keyed by the canonical URL, as probe results already are;
+  those that also read the URL string, e.g. lexical fields of the resolved
+  URL, by the exact URL;
+- offline fields are keyed by the exact URL and never expire;
+- label fields are never stored, they are recomputed on every hit.
+
+Each key is a hash of the URL, the schema of the stored fields (which
+includes `FEATURE_VERSION`) and whether they were computed offline, so
+changing a feature set never serves stale vectors. Values are the field
+values packed in schema order with a small tagged `struct` format, so a
+store never unpickles code. Expired entries are deleted, then past
+`max_bytes` the least recently used ones, sized from a running total kept
+by triggers.
+"""
+import os
+import struct
+import sqlite3
+import logging
+from math import ceil
+from numbers import Integral
+from time import time
+from datetime import date, datetime
+from hashlib import sha1
+from threading import local
+from functools import cached_property
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+from lib.data.cache import schema_hash
+from lib.features.base import URLComponent
+from lib.features.canonical import canonical_url
+from lib.features.graph import closure, network_needs, reads_url
+
+
+STORE_VERSION = 2
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS features (
+        key BLOB PRIMARY KEY,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL,
+        expires REAL,
+        size INTEGER NOT NULL,
+        value BLOB NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS features_accessed ON features (accessed)",
+    "CREATE INDEX IF NOT EXISTS features_expires ON features (expires) WHERE expires IS NOT NULL",
+    "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), rows INTEGER NOT NULL, bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO totals VALUES (0, 0, 0)",
+    """CREATE TRIGGER IF NOT EXISTS features_insert AFTER INSERT ON features BEGIN
+        UPDATE totals SET rows = rows + 1, bytes = bytes + NEW.size WHERE id = 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS features_delete AFTER DELETE ON features BEGIN
+        UPDATE totals SET rows = rows - 1, bytes = bytes - OLD.size WHERE id = 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS features_resize AFTER UPDATE OF size ON features BEGIN
+        UPDATE totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 0;
+    END""",
+]
+PARTS = ("live", "offline", "network", "canonical")
+EXPIRING = ("network", "canonical")
+
+INT64 = struct.Struct("<q")
+FLOAT64 = struct.Struct("<d")
+LENGTH = struct.Struct("<I")
+
+
+def _pack_text(tag: bytes, text: str, out: bytearray) -> None:
+    data = text.encode("utf-8", "surrogatepass")
+    out += tag + LENGTH.pack(len(data)) + data
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    if value is None:
+        out += b"N"
+    elif value is True or value is False:
+        out += b"T" if value else b"F"
+    elif isinstance(value, Integral):
+        if -2 ** 63 <= value < 2 ** 63:
+            out += b"i" + INT64.pack(int(value))
+        else:
+            _pack_text(b"I", str(value), out)
+    elif isinstance(value, float):
+        out += b"d" + FLOAT64.pack(value)
+    elif isinstance(value, str):
+        _pack_text(b"s", value, out)
+    elif isinstance(value, datetime):
+        # ISO strings, so aware datetimes keep their offset.
+        _pack_text(b"t", value.isoformat(), out)
+    elif isinstance(value, date):
+        _pack_text(b"D", value.isoformat(), out)
+    elif isinstance(value, (list, tuple)):
+        out += b"l" + LENGTH.pack(len(value))
+        for item in value:
+            _pack(item, out)
+    else:
+        raise TypeError(f"Cannot pack {type(value).__name__} feature values.")
+
+
+def pack(values: Iterable[Any]) -> bytes:
+    """Pack Feature Values (None, bool, int, float, str, date, datetime and lists of them)."""
+    out = bytearray()
+    for value in values:
+        _pack(value, out)
+    return bytes(out)
+
+
+def _unpack(data: bytes, offset: int) -> tuple[Any, int]:
+    tag, offset = data[offset:offset + 1], offset + 1
+    if tag == b"N":
+        return None, offset
+    if tag in (b"T", b"F"):
+        return tag == b"T", offset
+    if tag == b"i":
+        return INT64.unpack_from(data, offset)[0], offset + 8
+    if tag == b"d":
+        return FLOAT64.unpack_from(data, offset)[0], offset + 8
+    (length,), offset = LENGTH.unpack_from(data, offset), offset + 4
+    if tag == b"l":
+        items = []
+        for _ in range(length):
+            item, offset = _unpack(data, offset)
+            items.append(item)
+        return items, offset
+    text = data[offset:offset + length].decode("utf-8", "surrogatepass")
+    parse = {b"s": str, b"t": datetime.fromisoformat, b"D": date.fromisoformat, b"I": int}[tag]
+    return parse(text), offset + length
+
+
+def unpack(data: bytes) -> list[Any]:
+    """Feature Values packed by `pack`."""
+    values, offset = [], 0
+    while offset < len(data):
+        value, offset = _unpack(data, offset)
+        values.append(value)
+    return values
+
+
+class FeatureStore(BaseModel):
+    """On-Disk Cache of Feature Vectors, keyed by URL and Feature Schema."""
+    class Config:
+        arbitrary_types_allowed = True
+
+    path: str
+    feature_sets: list[Any]
+    fields: list[str]
+    offline: bool = False
+    ttl: float = 86_400
+    max_bytes: int = 2 ** 30
+    evict_every: int = 1000
+    touch_after: float = 3600
+    _local: local = PrivateAttr(default_factory=local)
+    _puts: int = PrivateAttr(default=0)
+
+    @cached_property
+    def parts(self) -> dict[str, list[str]]:
+        """Fields by how they are cached: never (live), forever (offline) or for `ttl`
+        keyed by the exact URL (network) or by the canonical URL (canonical)."""
+        parts = {part: [] for part in PARTS}
+        for feature_set in self.feature_sets:
+            for key in feature_set.model_computed_fields:
+                if key not in self.fields:
+                    continue
+                nodes = closure(feature_set, [key])
+                if (URLComponent, "label") in nodes:
+                    parts["live"].append(key)
+                elif network_needs(nodes) and not self.offline:
+                    parts["network" if reads_url(nodes) else "canonical"].append(key)
+                else:
+                    parts["offline"].append(key)
+        return parts
+
+    @cached_property
+    def schemas(self) -> dict[str, str]:
+        return {
+            part: schema_hash(keys + [f"offline={self.offline}"])
+            for part, keys in self.parts.items() if keys and part != "live"
+        }
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the calling thread, reopened after a fork."""
+        if getattr(self._local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._migrate(connection)
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return self._local.connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection) -> None:
+        """Create the Tables, dropping a store written in an older layout: it is only a cache."""
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                connection.execute("DROP TABLE IF EXISTS features")
+                connection.execute("DROP TABLE IF EXISTS totals")
+                connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+    def key(self, part: str, url: str) -> bytes:
+        address = canonical_url(url) if part == "canonical" else url
+        return sha1(f"{self.schemas[part]}\0{address}".encode()).digest()
+
+    def get_many(self, urls: list[str]) -> list[Optional[dict[str, Any]]]:
+        """Cached Fields of each URL, or None unless every stored part is present and fresh."""
+        keys = {(part, url): self.key(part, url) for url in urls for part in self.schemas}
+        if not keys:
+            return [None] * len(urls)
+        now = time()
+        rows = {}
+        for start in range(0, len(keys), 500):
+            chunk = list(keys.values())[start:start + 500]
+            rows.update(
+                (key, (expires, accessed, value)) for key, expires, accessed, value in self.connection.execute(
+                    f"SELECT key, expires, accessed, value FROM features WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+            )
+
+        results, touched = [], []
+        for url in urls:
+            features = {}
+            for part in self.schemas:
+                row = rows.get(keys[(part, url)])
+                if row is None or (row[0] is not None and row[0] < now):
+                    features = None
+                    break
+                features.update(zip(self.parts[part], unpack(row[2])))
+                if now - row[1] > self.touch_after:
+                    touched.append((now, keys[(part, url)]))
+            results.append(features)
+        if touched:
+            # Access times are coarse, so readers rarely need the write lock.
+            self.connection.executemany("UPDATE features SET accessed = ? WHERE key = ?", touched)
+        return results
+
+    def complete(self, obj: dict[str, Any], features: dict[str, Any]) -> dict[str, Any]:
+        """Cached Features of a Source Item with the live Fields recomputed, in field order."""
+        from lib.data.extract import FeatureExtractor
+
+        if self.parts["live"]:
+            components = URLComponent(**obj, offline=True)
+            features = dict(features, **FeatureExtractor.extract_features(
+                [feature_set(components=components) for feature_set in self.feature_sets], self.parts["live"]
+            ))
+        return {key: features[key] for key in self.fields if key in features}
+
+    def put_many(self, items: Iterable[tuple[str, dict[str, Any]]]) -> None:
+        """Store the Fields of each (URL, Features) pair."""
+        now, rows = time(), []
+        for url, features in items:
+            try:
+                values = {part: pack(features.get(key) for key in self.parts[part]) for part in self.schemas}
+            except TypeError as e:
+                logging.error(f"Error packing features of {url}: {e}")
+                continue
+            for part, value in values.items():
+                expires = now + self.ttl if part in EXPIRING else None
+                rows.append((self.key(part, url), now, now, expires, len(value), value))
+        if not rows:
+            return
+        try:
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.connection.executemany(
+                    "INSERT INTO features (key, created, accessed, expires, size, value) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET created = excluded.created, accessed = excluded.accessed, "
+                    "expires = excluded.expires, size = excluded.size, value = excluded.value",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Error writing feature store {self.path}: {e}")
+            return
+        self._puts += len(rows)
+        if self._puts >= self.evict_every:
+            self._puts = 0
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones down to 90% of `max_bytes`."""
+        connection = self.connection
+        expired = evicted = 0
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                expired = connection.execute("DELETE FROM features WHERE expires < ?", (time(),)).rowcount
+                rows, total = connection.execute("SELECT rows, bytes FROM totals WHERE id = 0").fetchone()
+                if total > self.max_bytes:
+                    # Entries are similar in size, so the average size turns the bytes over into a row count.
+                    count = ceil((total - int(self.max_bytes * 0.9)) * rows / total)
+                    evicted = connection.execute(
+                        "DELETE FROM features WHERE key IN (SELECT key FROM features ORDER BY accessed LIMIT ?)",
+                        (count,)
+                    ).rowcount
+        except sqlite3.Error as e:
+            logging.error(f"Error evicting from feature store {self.path}: {e}")
+        if expired or evicted:
+            logging.info(f"Dropped {expired} expired and evicted {evicted} entries from feature store {self.path}.")
+        return expired + evicted
+
+    @property
+    def size(self) -> int:
+        """Bytes of stored Values, from the running total."""
+        return self.connection.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT rows FROM totals WHERE id = 0").fetchone()[0]
@@ -0,0 +1,249 @@
+import os
+import json
+import logging
+from uuid import uuid4
+from heapq import nlargest
+from time import monotonic, sleep
+from functools import cached_property
+from typing import Any, Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+
+CATEGORICAL_FIELDS = [
+    "lx_tld",
+    "lx_scheme",
+    "lx_path_extension",
+    "hd_server",
+    "hd_content_type",
+    "hd_encoding",
+    "hd_connection",
+]
+
+NULL, RARE = 0, 1
+RESERVED = ["<null>", "<rare>"]
+
+
+class Vocabulary(BaseModel):
+    """Append-only Vocabulary of a Categorical Field.
+
+    Codes 0 and 1 are reserved for nulls and for values seen fewer than
+    `min_count` times. A value gets the next free code once it reaches
+    `min_count` and keeps it forever after.
+
+    Promotion happens online, so the first `min_count - 1` occurrences of a
+    value are written as RARE and later ones under its own code: RARE means
+    "rare when written", not "rare overall". Encode a first pass with
+    `grow=True` and write a second one with `grow=False` to give every
+    occurrence its final code.
+    """
+    field: str
+    min_count: int = 5
+    max_pending: int = 100_000
+    tokens: list[Optional[str]] = list(RESERVED)
+    pending: dict[str, int] = {}
+
+    @cached_property
+    def index(self) -> dict[str, int]:
+        return {token: code for code, token in enumerate(self.tokens) if token is not None}
+
+    def encode(self, value: Optional[Any], grow: bool = True) -> int:
+        if value is None:
+            return NULL
+        value = str(value)
+        code = self.index.get(value)
+        if code is not None and code >= len(RESERVED):
+            return code
+        if not grow:
+            return RARE
+
+        count = self.pending.get(value, 0) + 1
+        if count < self.min_count:
+            self.pending[value] = count
+            if len(self.pending) > self.max_pending:
+                self._prune()
+            return RARE
+
+        self.pending.pop(value, None)
+        return self._assign(value)
+
+    def _assign(self, value: str) -> int:
+        """Give a Value the next free Code."""
+        return self._remember(value, len(self.tokens))
+
+    def _remember(self, value: str, code: int) -> int:
+        self.tokens.extend([None] * (code + 1 - len(self.tokens)))
+        self.tokens[code] = value
+        self.index[value] = code
+        return code
+
+    def decode(self, code: int) -> Optional[str]:
+        if code == NULL:
+            return None
+        return self.tokens[code]
+
+    def _prune(self) -> None:
+        """Keep the most frequent half of the pending counts, keeping memory bounded
+        and pruning at most once every `max_pending // 2` new values."""
+        self.pending = dict(nlargest(self.max_pending // 2, self.pending.items(), key=lambda item: item[1]))
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+
+class SharedVocabulary(Vocabulary):
+    """Vocabulary whose Codes are assigned atomically in a MongoDB Collection.
+
+    Every worker writing the same collection gets the same code for a value,
+    whichever of them promoted it first. Pending counts stay per worker, so
+    a value is promoted once any worker has seen it `min_count` times.
+    Documents are `{_id: "<field>:<value>", field, token, owner, code}`, next
+    to one `{_id: "<field>"}` counter per field.
+
+    Only the worker that inserts a value document draws its code from the
+    counter, so codes have no gaps; the others wait for it. If the inserter
+    has not set the code after `claim_timeout` seconds, e.g. because it died,
+    a waiting worker takes over, which leaves a gap only if the inserter
+    had already drawn one.
+    """
+    claim_timeout: float = 10.0
+    poll_interval: float = 0.05
+    _collection: Any = PrivateAttr(default=None)
+    _owner: str = PrivateAttr(default_factory=lambda: uuid4().hex)
+
+    @classmethod
+    def load(cls, collection: Any, field: str, **settings) -> "SharedVocabulary":
+        vocabulary = cls(field=field, tokens=list(RESERVED), **settings)
+        vocabulary._collection = collection
+        for document in collection.find({"field": field, "code": {"$exists": True}}, {"token": 1, "code": 1}):
+            vocabulary._remember(document["token"], document["code"])
+        return vocabulary
+
+    def encode(self, value: Optional[Any], grow: bool = True) -> int:
+        if value is not None and grow and str(value) not in self.index and str(value) not in self.pending:
+            # First sighting on this worker: another one may have coded it already.
+            document = self._collection.find_one({"_id": f"{self.field}:{value}"}, {"code": 1})
+            if document is not None and "code" in document:
+                return self._remember(str(value), document["code"])
+        return super().encode(value, grow)
+
+    def _allocate(self, key: str) -> Optional[int]:
+        """Draw the next Code from the field counter for a Value this worker owns,
+        None if another worker claimed it meanwhile."""
+        from pymongo import ReturnDocument
+
+        counter = self._collection.find_one_and_update(
+            {"_id": self.field}, {"$inc": {"next": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        code = len(RESERVED) + counter["next"] - 1
+        result = self._collection.update_one(
+            {"_id": key, "owner": self._owner, "code": {"$exists": False}}, {"$set": {"code": code}}
+        )
+        return code if result.modified_count else None
+
+    def _assign(self, value: str) -> int:
+        """Code of the Value in the Collection, allocated by whichever worker inserts it."""
+        key = f"{self.field}:{value}"
+        owner = self._collection.update_one(
+            {"_id": key}, {"$setOnInsert": {"field": self.field, "token": value, "owner": self._owner}}, upsert=True
+        ).upserted_id is not None
+        deadline = monotonic() + self.claim_timeout
+        while True:
+            code = self._allocate(key) if owner else None
+            if code is not None:
+                return self._remember(value, code)
+            document = self._collection.find_one({"_id": key}, {"code": 1, "owner": 1})
+            if "code" in document:
+                return self._remember(value, document["code"])
+            if monotonic() < deadline:
+                sleep(self.poll_interval)
+                continue
+            logging.info(f"Claiming the code of {key} from worker {document['owner']}.")
+            owner = self._collection.update_one(
+                {"_id": key, "owner": document["owner"], "code": {"$exists": False}},
+                {"$set": {"owner": self._owner}}
+            ).modified_count == 1
+            deadline = monotonic() + self.claim_timeout
+
+
+class CategoricalEncoder(BaseModel):
+    """Persistent Integer Encoding of Categorical Feature Fields.
+
+    A vocabulary file at `path` supports a single writer. Workers sharing one
+    output collection must share a vocabulary `collection` instead.
+    """
+    class Config:
+        arbitrary_types_allowed = True
+
+    path: Optional[str] = None
+    collection: Optional[Any] = None
+    fields: list[str] = CATEGORICAL_FIELDS
+    min_count: int = 5
+    keep_strings: bool = True
+    grow: bool = True
+    _saved: int = PrivateAttr(default=-1)
+
+    @cached_property
+    def vocabularies(self) -> dict[str, Vocabulary]:
+        if self.collection is not None:
+            return {
+                field: SharedVocabulary.load(self.collection, field, min_count=self.min_count)
+                for field in self.fields
+            }
+        stored = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    stored = json.load(f)
+            except Exception as e:
+                logging.error(f"Error reading vocabulary {self.path}: {e}")
+                raise
+        return {
+            field: Vocabulary(**stored[field]) if field in stored
+                else Vocabulary(field=field, min_count=self.min_count)
+            for field in self.fields
+        }
+
+    @staticmethod
+    def code_key(field: str) -> str:
+        return f"{field}_code"
+
+    @cached_property
+    def code_keys(self) -> list[str]:
+        return [self.code_key(field) for field in self.fields]
+
+    def encode(self, features: dict[str, Any]) -> dict[str, Any]:
+        """Add `<field>_code` to a Feature Document, dropping strings unless kept."""
+        encoded = dict(features)
+        for field, vocabulary in self.vocabularies.items():
+            if field not in features:
+                continue
+            encoded[self.code_key(field)] = vocabulary.encode(features[field], self.grow)
+            if not self.keep_strings:
+                del encoded[field]
+        return encoded
+
+    @property
+    def size(self) -> int:
+        return sum(len(vocabulary) for vocabulary in self.vocabularies.values())
+
+    def checkpoint(self) -> None:
+        """Save the Vocabularies if Codes were assigned since the last save. Call it
+        before writing encoded features, so no stored code is missing from the file."""
+        if self.path is not None and self.size != self._saved:
+            self.save()
+
+    def save(self) -> None:
+        """Persist the Vocabularies atomically, a no-op for a shared Collection."""
+        if self.path is None:
+            return
+        size = self.size
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {field: vocabulary.model_dump() for field, vocabulary in self.vocabularies.items()}, f
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._saved = size
@@ -1,6 +1,18 @@
-__all__ = ['header',  'lexical']
+__all__ = ['header',  'lexical', 'membership', 'ngram']
 
 
-from .header import HeaderFeatures
-from .lexical import LexicalFeatures
-
+def __getattr__(name):
+    """Import Feature Sets on first use, keeping `import lib.features` cheap."""
+    if name == "HeaderFeatures":
+        from .header import HeaderFeatures
+        return HeaderFeatures
+    if name == "LexicalFeatures":
+        from .lexical import LexicalFeatures
+        return LexicalFeatures
+    if name == "ListFeatures":
+        from .membership import ListFeatures
+        return ListFeatures
+    if name == "NGramFeatures":
+        from .ngram import NGramFeatures
+        return NGramFeatures
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,18 +1,27 @@
 import logging
 from math import log
 from collections import Counter
-from functools import cached_property
+from functools import cached_property, lru_cache
 from datetime import datetime, date, timezone
-from dateutil.parser import parse
 from pydantic import BaseModel
-from requests import Response, head
-from urllib.parse import urlparse
+
+from lib.features.digest import HeaderDigest
+from lib.features.httpdate import parse_http_date
+from lib.features.canonical import canonical_url
+from lib.features.probe import Hop, follow, probe_flights
+from lib.features.suffix import HostParts, split_host
+from lib.features.tokenize import URLTokens, tokenize
 
 from functools import cached_property
 
 from enum import Enum
 from typing import Any, Optional
 
+
+# Part of every cache and store schema hash: bump it whenever a field changes
+# meaning without changing its name, so stale vectors are never served.
+FEATURE_VERSION = 1
+
     
 class URLLabel(str, Enum):
     """URL Type labels for learning tasks"""
@@ -28,38 +37,51 @@ class URLItem(BaseModel):
 
 
 class URLComponent(URLItem):
+    offline: bool = False
+
     @staticmethod
     def _get_host(url:str) -> str:
-        return url.split("://")[-1].split("/")[0].strip("www.")
+        tokens = tokenize(url if "://" in url else f"//{url}")
+        return tokens.component(tokens.host).removeprefix("www.")
 
-    @staticmethod
-    def _make_head_request(url:str, timeout:int,  allow_redirects:bool=True) -> Optional[Response]:
-        """Make a request to a URL."""
-        headers={'user-agent': 'Mozilla/5.0'}
-        try:
-            req = head(url, allow_redirects=allow_redirects, headers=headers, timeout=timeout)
-            logging.info(f"Request to {url} was successful with {req.status_code}.")
-            return req
-        except Exception as e:
-            logging.error(f"Error making request to {url}: {e}")
-            return None
-        
     @cached_property
     def today(self) -> date:
         return datetime.now(timezone.utc).date()
     
     
     @cached_property
-    def cp_response(self) -> Optional[Response]:
+    def cp_canonical(self) -> str:
+        return canonical_url(self.url)
+
+    @cached_property
+    def cp_hops(self) -> list[Hop]:
+        if "cp_digest" in self.__dict__:
+            raise RuntimeError("cp_hops is released once cp_digest is built, read cp_digest instead.")
+        if self.offline:
+            return []
         _url = self.url
         if "://" not in self.url and not self.url.startswith("http"):
             _url = f"http://{self.url}"
-        return self._make_head_request(_url, 3)
+        return probe_flights.run(self.cp_canonical, follow, _url)
+
+    @cached_property
+    def cp_digest(self) -> Optional[HeaderDigest]:
+        """Slim record of the Redirect Chain; the Hops are released once it is built,
+        and reading `cp_hops` afterwards raises instead of probing again."""
+        hops = self.cp_hops
+        self.__dict__.pop("cp_hops", None)
+        if not hops:
+            return None
+        return HeaderDigest.from_hops(hops)
+
+    @cached_property
+    def cp_response(self) -> Optional[HeaderDigest]:
+        return self.cp_digest
     
     @cached_property
-    def cp_redirects(self) -> list[Response]:
+    def cp_redirects(self) -> list[str]:
         if bool(self.cp_response):
-            return self.cp_response.history
+            return list(self.cp_response.redirects)
         return []
     
     @cached_property
@@ -79,15 +101,10 @@ class URLComponent(URLItem):
         
         return self.cp_response.url
 
-    @cached_property
-    def cp_parsed_resolved(self):
-        return urlparse(self.cp_resolved)
-    
     @cached_property
     def cp_headers(self) -> Optional[dict[str, Any]]:
-        print(self.cp_resolved)
-        if bool(self.cp_response):
-            return {k.lower():v for k,v in self.cp_response.headers.items()}
+        if bool(self.cp_digest):
+            return dict(self.cp_digest.headers)
         return {}
     
     @cached_property
@@ -97,77 +114,132 @@ class URLComponent(URLItem):
         return None
     
     @cached_property
-    def cp_cookies(self) -> Optional[dict[str, Any]]:
-        if bool(self.cp_response):
-            return self.cp_response.cookies.get_dict()
-        return {}
+    def cp_tokens(self) -> URLTokens:
+        return tokenize(self.cp_resolved)
+
+    @cached_property
+    def cp_host_tokens(self) -> URLTokens:
+        """Tokens of the resolved URL, read as `//host/path` when it has no host, e.g. `example.com/path`."""
+        if self.cp_tokens.host[0] < 0:
+            return tokenize(f"//{self.cp_resolved}")
+        return self.cp_tokens
 
     @cached_property
     def cp_scheme(self) -> str:
-        return self.cp_parsed_resolved.scheme
-    
+        """Lowercased Scheme, empty when the URL was read from the host, e.g. `example.com:8080/path`."""
+        tokens = self.cp_host_tokens
+        return tokens.url[:tokens.scheme_end].lower() if tokens.scheme_end >= 0 else ""
+
     @cached_property
     def cp_host(self) -> str:
-        if self.cp_parsed_resolved.netloc:
-            return self.cp_parsed_resolved.netloc
-        return self._get_host(self.cp_resolved)
+        """Authority of the resolved URL, with userinfo and port, as `urlsplit(...).netloc`."""
+        tokens = self.cp_host_tokens
+        return tokens.component(tokens.authority)
+
+    @cached_property
+    def cp_hostname(self) -> str:
+        """Lowercased Hostname, without userinfo, port or IPv6 brackets."""
+        tokens = self.cp_host_tokens
+        return tokens.component(tokens.host).lower().strip("[]")
+
+    @cached_property
+    def cp_host_parts(self) -> HostParts:
+        return split_host(self.cp_hostname)
     
     @cached_property
     def cp_path(self) -> str:
-        if self.cp_parsed_resolved.path:
-            return self.cp_parsed_resolved.path
-        return self.url.split("//")[-1].split("/", 1)[-1]
+        tokens = self.cp_host_tokens
+        return tokens.component(tokens.path)
         
     @cached_property
     def cp_query(self) -> Optional[str]:
-        return self.cp_parsed_resolved.query
+        return self.cp_tokens.component(self.cp_tokens.query)
 
     @cached_property
     def cp_query_params(self) -> list[Optional[tuple[str, str]]]:
-        if not bool(self.cp_query):
-            return []
-        
+        url = self.cp_tokens.url
         params = [
-            tuple(qp.split("=")) for qp in 
-                self.cp_query.split("&") if qp != ""
+            tuple(url[start:end].split("=")) for start, end in 
+                self.cp_tokens.param_spans()
         ]
         return params
     
     @cached_property
     def cp_fragments(self) -> list[str]:
-        return self.cp_parsed_resolved.fragment.split("#")
+        return self.cp_tokens.component(self.cp_tokens.fragment).split("#")
     
     @cached_property
     def cp_port(self) -> Optional[int]:
-        return self.cp_parsed_resolved.port
+        """Port of the resolved URL, raising ValueError for an invalid one as `urlsplit(...).port` does."""
+        tokens = self.cp_host_tokens
+        port = tokens.component(tokens.port)
+        if not port:
+            return None
+        if not port.isascii() or not port.isdigit() or int(port) > 65535:
+            raise ValueError(f"Port could not be cast to integer value as {port!r}")
+        return int(port)
+
+    @cached_property
+    def cp_userinfo(self) -> Optional[tuple[str, Optional[str]]]:
+        tokens = self.cp_host_tokens
+        if tokens.userinfo[0] < 0:
+            return None
+        username, colon, password = tokens.component(tokens.userinfo).partition(":")
+        return username, password if colon else None
     
     @cached_property
     def cp_username(self) -> Optional[str]:
-        return self.cp_parsed_resolved.username
+        return self.cp_userinfo[0] if self.cp_userinfo else None
     
     @cached_property
     def cp_password(self) -> Optional[str]:
-        return self.cp_parsed_resolved.password
+        return self.cp_userinfo[1] if self.cp_userinfo else None
 
 
 class Feature(BaseModel):
     """Base Feature Set Class."""
     class Config:
         arbitrary_types_allowed = True
+        defer_build = True
 
     @staticmethod 
     def parse_date_string(date_str: str|None) -> date|None:
-        """Parse a date string."""
+        """Parse a date string, HTTP-dates first and fuzzy parsing as a fallback."""
+        if date_str is None:
+            return None
+        return parse_http_date(date_str) or Feature._parse_fuzzy_date(date_str)
+
+    @staticmethod
+    def _parse_fuzzy_date(date_str: str) -> date|None:
+        """Fuzzy-parse a date string. The parsed fields are memoized, and the ones the
+        string leaves out ("Monday", "10:00") are filled from the current time on every call."""
+        parsed = Feature._parse_fuzzy_fields(date_str)
+        if parsed is None:
+            return None
+        fields, parser = parsed
         try:
-            return parse(
-                date_str, fuzzy=True, 
-                default=
-                datetime.now(timezone.utc)
-            )
+            naive = parser._build_naive(fields, datetime.now(timezone.utc))
+            return parser._build_tzaware(naive, fields, None)
         except Exception as e:
-            logging.error(f"Error parsing date string: {e}")
+            logging.error(f"Error parsing date string: {e}: {date_str}")
         return None
-        
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_fuzzy_fields(date_str: str) -> Optional[tuple[Any, Any]]:
+        """Fields dateutil finds in a date string, parsed once without any default."""
+        from dateutil.parser import parser
+
+        parser = parser()
+        try:
+            fields, _ = parser._parse(date_str, fuzzy=True)
+        except Exception as e:
+            logging.error(f"Error parsing date string: {e}: {date_str}")
+            return None
+        if fields is None or len(fields) == 0:
+            logging.error(f"Error parsing date string: no date in {date_str}")
+            return None
+        return fields, parser
 
     @staticmethod
     def entropy(s: str) -> float:
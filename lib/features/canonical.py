@@ -0,0 +1,31 @@
+from urllib.parse import urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_host(netloc: str, scheme: str) -> str:
+    """Lowercase the Host, drop `www.` and the Scheme's default Port."""
+    userinfo, _, hostport = netloc.rpartition("@")
+    host, sep, port = hostport.lower().rpartition(":")
+    if not sep or "]" in port:
+        host, port = hostport.lower(), ""
+    if port and port.isdigit() and int(port) == DEFAULT_PORTS.get(scheme):
+        port = ""
+    host = host.rstrip(".").removeprefix("www.")
+    return (f"{userinfo}@" if userinfo else "") + host + (f":{port}" if port else "")
+
+
+def canonical_url(url: str) -> str:
+    """Canonical Key of a URL, computed without any network access.
+
+    URLs differing only by scheme/host case, a `www.` prefix, default port,
+    trailing slash, fragment or query parameter order share a key.
+    """
+    if "://" not in url:
+        url = f"http://{url}"
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    path = parts.path.rstrip("/") or "/"
+    query = "&".join(sorted(qp for qp in parts.query.split("&") if qp != ""))
+    return urlunsplit((scheme, canonical_host(parts.netloc, scheme), path, query, ""))
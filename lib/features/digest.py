@@ -0,0 +1,103 @@
+import logging
+from typing import Optional
+
+from pydantic import BaseModel
+
+from lib.features.probe import Hop
+
+
+SELECTED_HEADERS = (
+    "cache-control",
+    "connection",
+    "content-encoding",
+    "content-length",
+    "content-type",
+    "expires",
+    "keep-alive",
+    "last-modified",
+    "server",
+    "x-content-type-options",
+    "x-xss-protection",
+)
+
+
+def parse_directives(value: Optional[str]) -> dict[str, str]:
+    """Parse a `key=value, flag` Header Value such as Cache-Control or Keep-Alive."""
+    directives = {}
+    for part in (value or "").split(","):
+        key, _, val = part.strip().partition("=")
+        if key:
+            directives[key.lower()] = val.strip().strip('"')
+    return directives
+
+
+def directive_int(directives: dict[str, str], key: str) -> Optional[int]:
+    if key not in directives:
+        return None
+    try:
+        return int(directives[key])
+    except ValueError as e:
+        logging.error(e)
+        return None
+
+
+class HeaderDigest(BaseModel):
+    """Immutable summary of a Redirect Chain, parsed once for all Header Features.
+
+    It holds only what the features read, with header and cookie values
+    reduced to their entropy, so the Hops it was built from can be released
+    as soon as it exists.
+    """
+    class Config:
+        frozen = True
+
+    url: str
+    ok: bool
+    status_code: int
+    elapsed: float
+    encoding: Optional[str] = None
+    headers: dict[str, str] = {}
+    num_headers: int = 0
+    header_entropy: float = 0.0
+    header_length: int = 0
+    max_age: Optional[int] = None
+    keep_alive_timeout: Optional[int] = None
+    keep_alive_max: Optional[int] = None
+    num_history: int = 0
+    num_cookies: int = 0
+    cookie_entropy: float = 0.0
+    redirects: tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        """Truthiness mirrors `requests.Response`, i.e. False for 4xx/5xx."""
+        return self.ok
+
+    @classmethod
+    def from_hops(cls, hops: list[Hop]) -> "HeaderDigest":
+        """Digest the final Hop of a Redirect Chain."""
+        from requests.utils import get_encoding_from_headers
+        from lib.features.base import Feature
+
+        response = hops[-1]
+        header_values = "".join(response.headers.values())
+        headers = response.headers
+        cache_control = parse_directives(headers.get("cache-control"))
+        keep_alive = parse_directives(headers.get("keep-alive"))
+        return cls(
+            url=response.url,
+            ok=response.ok,
+            status_code=response.status_code,
+            elapsed=response.elapsed,
+            encoding=get_encoding_from_headers(headers),
+            headers={k: headers[k] for k in SELECTED_HEADERS if k in headers},
+            num_headers=len(headers),
+            header_entropy=Feature.entropy(header_values),
+            header_length=len(header_values),
+            max_age=directive_int(cache_control, "max-age"),
+            keep_alive_timeout=directive_int(keep_alive, "timeout"),
+            keep_alive_max=directive_int(keep_alive, "max"),
+            num_history=len(hops) - 1,
+            num_cookies=len(response.cookies),
+            cookie_entropy=Feature.entropy("".join(response.cookies.values())),
+            redirects=tuple(hop.url for hop in hops[:-1]),
+        )
@@ -0,0 +1,142 @@
+import ast
+import inspect
+from textwrap import dedent
+from functools import cached_property, lru_cache
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel
+
+from lib.features.base import URLComponent
+from lib.features.header import HeaderFeatures
+
+
+# Properties that cost a network round trip, by the class that owns them.
+NETWORK_ROOTS = {
+    (URLComponent, "cp_hops"): "probe",
+    (HeaderFeatures, "certificate"): "certificate",
+}
+
+# Properties that read the URL string but only depend on its canonical form:
+# probes are coalesced and cached by canonical URL.
+CANONICAL_READERS = {
+    (URLComponent, "cp_canonical"),
+    (URLComponent, "cp_hops"),
+}
+
+Node = tuple[type, str]
+
+
+def _function(cls: type, name: str) -> Optional[Any]:
+    """Underlying function of a (computed) property or method on a class."""
+    info = getattr(cls, "model_computed_fields", {}).get(name)
+    obj = info.wrapped_property if info is not None else None
+    if obj is None:
+        obj = next((klass.__dict__[name] for klass in cls.__mro__ if name in klass.__dict__), None)
+    if isinstance(obj, cached_property):
+        return obj.func
+    if isinstance(obj, property):
+        return obj.fget
+    if isinstance(obj, (staticmethod, classmethod)):
+        return obj.__func__
+    return obj if inspect.isfunction(obj) else None
+
+
+@lru_cache(maxsize=None)
+def dependencies(cls: type, name: str) -> frozenset[Node]:
+    """Direct `self.x` and `self.components.x` Dependencies of a Property."""
+    func = _function(cls, name)
+    if func is None:
+        return frozenset()
+    components = None
+    if issubclass(cls, BaseModel) and "components" in cls.model_fields:
+        components = cls.model_fields["components"].annotation
+
+    nodes = set()
+    for node in ast.walk(ast.parse(dedent(inspect.getsource(func)))):
+        if not isinstance(node, ast.Attribute):
+            continue
+        if isinstance(node.value, ast.Name) and node.value.id == "self":
+            if node.attr != "components" and _function(cls, node.attr) is not None:
+                nodes.add((cls, node.attr))
+        elif (
+            components is not None
+            and isinstance(node.value, ast.Attribute)
+            and node.value.attr == "components"
+            and isinstance(node.value.value, ast.Name) and node.value.value.id == "self"
+        ):
+            nodes.add((components, node.attr))
+    nodes.discard((cls, name))
+    return frozenset(nodes)
+
+
+def closure(cls: type, names: Iterable[str]) -> set[Node]:
+    """All Properties transitively required to compute the given Fields."""
+    seen, stack = set(), [(cls, name) for name in names]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        stack.extend(dependencies(*node))
+    return seen
+
+
+def network_needs(nodes: Iterable[Node]) -> set[str]:
+    """Network Fetches (`probe`, `certificate`) a set of Properties requires."""
+    needs = set()
+    for klass, name in nodes:
+        if (klass, name) in NETWORK_ROOTS:
+            needs.add(NETWORK_ROOTS[(klass, name)])
+    return needs
+
+
+@lru_cache(maxsize=None)
+def _reads_url(cls: type, name: str) -> bool:
+    """Whether a URLComponent Property reads `self.url` directly."""
+    func = _function(cls, name)
+    if func is None or not issubclass(cls, URLComponent):
+        return False
+    return any(
+        isinstance(node, ast.Attribute) and node.attr == "url"
+        and isinstance(node.value, ast.Name) and node.value.id == "self"
+        for node in ast.walk(ast.parse(dedent(inspect.getsource(func))))
+    )
+
+
+def reads_url(nodes: Iterable[Node]) -> bool:
+    """Whether a set of Properties depends on the exact URL string, not only its canonical form."""
+    return any(
+        node == (URLComponent, "url") or (node not in CANONICAL_READERS and _reads_url(*node))
+        for node in nodes
+    )
+
+
+class Projection(BaseModel):
+    """Subset of Computed Fields to extract, with the fetches it requires."""
+    fields: list[str]
+    feature_sets: list[Any]
+
+    @cached_property
+    def plan(self) -> dict[Any, list[str]]:
+        """Projected Fields per Feature Set, dropping Feature Sets with none."""
+        unknown = set(self.fields) - {
+            key for feature_set in self.feature_sets for key in feature_set.model_computed_fields
+        }
+        if unknown:
+            raise ValueError(f"Unknown feature fields in projection: {sorted(unknown)}")
+        plan = {}
+        for feature_set in self.feature_sets:
+            keys = [key for key in feature_set.model_computed_fields if key in self.fields]
+            if keys:
+                plan[feature_set] = keys
+        return plan
+
+    @cached_property
+    def needs(self) -> set[str]:
+        return network_needs(
+            node for feature_set, keys in self.plan.items() for node in closure(feature_set, keys)
+        )
+
+    @property
+    def offline(self) -> bool:
+        return "probe" not in self.needs
@@ -1,280 +1,246 @@
-import ssl
 import logging
 from functools import cached_property
 from typing import Optional
 from datetime import date, datetime
 
-from pydantic import computed_field
-
-from cryptography import x509
-from cryptography.x509 import Certificate
+from pydantic import BaseModel, computed_field
 
 from lib.features.base import Feature, URLComponent
+from lib.features.digest import HeaderDigest
+from lib.features.probe import certificate_flights
+
+
+class CertificateSummary(BaseModel):
+    """The few Certificate attributes the features read, without the PEM or parsed Certificate."""
+    class Config:
+        frozen = True
+
+    issued: Optional[date] = None
+    expires: Optional[date] = None
+    num_extensions: int = 0
+    entropy: float = 0.0
+
+    @classmethod
+    def from_pem(cls, pem: str) -> Optional["CertificateSummary"]:
+        from cryptography import x509
+
+        try:
+            certificate = x509.load_pem_x509_certificate(str.encode(pem))
+        except Exception as e:
+            logging.error(e)
+            return None
+        return cls(
+            issued=certificate.not_valid_before_utc.date(),
+            expires=certificate.not_valid_after_utc.date(),
+            num_extensions=len(certificate.extensions),
+            entropy=Feature.entropy(pem),
+        )
+
+
+def fetch_certificate(host: str) -> Optional[CertificateSummary]:
+    """Fetch and summarize the Certificate served on port 443."""
+    import ssl
+
+    pem = ssl.get_server_certificate((host, 443), timeout=5)
+    return CertificateSummary.from_pem(pem) if pem else None
 
 
 class HeaderFeatures(Feature):
     components: URLComponent
     
-    @staticmethod
-    def _get_header_key(prop:str|None, _key:str, delim:str=",") -> Optional[int]:
-        if bool(prop):
-            values = list(
-                map(
-                    lambda x: x.split("=")[-1], 
-                    filter(
-                        lambda x: _key in x, prop.split()
-                    )
-                )
-            )
-            if bool(values):
-                try:
-                    value = values[0].strip().split(delim)[0]
-                    return int(value)
-                except Exception as e:
-                    logging.error(e)
-                    return None
-        return None
-    
     @cached_property
-    def certificate(self) -> str|None:
+    def certificate(self) -> Optional[CertificateSummary]:
+        if self.components.offline:
+            return None
         if bool(self.components.cp_scheme) and bool(self.components.cp_host):
             if "https" in self.components.cp_scheme.lower():
                 try:
-                    return ssl.get_server_certificate((self.components.cp_host, 443), timeout=5)
+                    return certificate_flights.run(
+                        self.components.cp_host.lower(), fetch_certificate, self.components.cp_host
+                    )
                 except Exception as e:
                     logging.error(e)
         return None
     
     @cached_property
-    def hd_response(self):
-        return self.components.cp_response
+    def hd_digest(self) -> Optional[HeaderDigest]:
+        return self.components.cp_digest
     
     @cached_property
     def hd_has_headers(self) -> Optional[bool]:
-        try:
-            return bool(self.hd_response.headers)
-        except Exception as e:
-            logging.error(e)
-            return None
-    
-    @cached_property
-    def hd_certificate(self) -> Certificate|None:
-        if self.certificate:
-            try:
-                return x509.load_pem_x509_certificate(
-                    str.encode(
-                        self.certificate
-                    )
-                )
-            except Exception as e:
-                logging.error(e)
+        if self.hd_digest is not None:
+            return bool(self.hd_digest.num_headers)
         return None
     
     @cached_property
     def _hd_certificate_issued(self) -> Optional[date]:
-        if bool(self.hd_certificate):
-            return self.hd_certificate.not_valid_before_utc.date()
+        if bool(self.certificate):
+            return self.certificate.issued
 
     @cached_property
     def _hd_certificate_expires(self) -> Optional[date]:
-        if bool(self.hd_certificate):
-            return self.hd_certificate.not_valid_after_utc.date()
+        if bool(self.certificate):
+            return self.certificate.expires
     
     @computed_field
     @cached_property
     def hd_status_code(self) -> Optional[int]:
-        try:
-            return self.hd_response.status_code
-        except Exception as e:
-            logging.error(e)
-            return None
+        if self.hd_digest is not None:
+            return self.hd_digest.status_code
+        return None
 
     
     @computed_field
     @cached_property
     def hd_response_time(self) -> Optional[float]:
-        try:
-            return self.hd_response.elapsed.total_seconds()
-        except Exception as e:
-            logging.error(e)
-            return None
+        if self.hd_digest is not None:
+            return self.hd_digest.elapsed
+        return None
 
     
     @computed_field
     @cached_property
     def hd_encoding(self) -> Optional[str]:
-        try:
-            return self.hd_response.encoding
-        except Exception as e:
-            logging.error(e)
-            return None
+        if self.hd_digest is not None:
+            return self.hd_digest.encoding
+        return None
         
     @computed_field
     @cached_property
     def hd_content_encoding(self) -> Optional[str]:
-        try:
-            return self.hd_response.headers.get("content-encoding", None)
-        except Exception as e:
-            logging.error(e)
-            return None
+        if self.hd_digest is not None:
+            return self.hd_digest.headers.get("content-encoding", None)
+        return None
         
     @computed_field
     @cached_property
     def hd_last_modified(self) -> Optional[date]:
-        
-        try:
-            date_str = self.hd_response.headers.get("last-modified", None)
-            return self.parse_date_string(date_str)
-        except Exception as e:
-            logging.error(e)
-            return None
+        if self.hd_digest is not None:
+            return self.parse_date_string(self.hd_digest.headers.get("last-modified", None))
+        return None
         
     @computed_field
     @cached_property
     def hd_num_header_keys(self) -> Optional[int]:
-        try:
-            return len(self.hd_response.headers.keys())
-        except Exception as e:
-            logging.error(e)
-            return None
+        if self.hd_digest is not None:
+            return self.hd_digest.num_headers
+        return None
         
     @computed_field
     @cached_property
     def hd_connection(self) -> Optional[str]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.hd_response.headers.get("connection", None)
+        if bool(self.hd_digest):
+            return self.hd_digest.headers.get("connection", None)
     
     @computed_field
     @cached_property
     def hd_server(self) -> Optional[str]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.hd_response.headers.get("server", None)
+        if bool(self.hd_digest):
+            return self.hd_digest.headers.get("server", None)
     
     @computed_field
     @cached_property
     def hd_content_type(self) -> Optional[str]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.hd_response.headers.get("content-type", None)
+        if bool(self.hd_digest):
+            return self.hd_digest.headers.get("content-type", None)
     
     @computed_field
     @cached_property
     def hd_cache_control(self) -> Optional[str]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.hd_response.headers.get("cache-control", None)
+        if bool(self.hd_digest):
+            return self.hd_digest.headers.get("cache-control", None)
     
     @computed_field
     @cached_property
     def hd_keep_alive(self) -> Optional[str]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.hd_response.headers.get("keep-alive", None)
+        if bool(self.hd_digest):
+            return self.hd_digest.headers.get("keep-alive", None)
     
     @computed_field
     @cached_property
     def hd_keep_alive_timeout(self) -> Optional[int]:
-        try:
-            return self._get_header_key(self.hd_keep_alive, "timeout")
-        except Exception as e:
-            logging.error(e)
-            return None
+        if bool(self.hd_digest):
+            return self.hd_digest.keep_alive_timeout
 
     @computed_field
     @cached_property
     def hd_keep_alive_max(self) -> Optional[int]:
-        try:
-            return self._get_header_key(self.hd_keep_alive, "max")
-        except Exception as e:
-            logging.error(e)
-            return None
+        if bool(self.hd_digest):
+            return self.hd_digest.keep_alive_max
     
     @computed_field
     @cached_property
     def hd_cache_max_age(self) -> Optional[int]:
-        try:
-            return self._get_header_key(self.hd_cache_control, "max-age")
-        except Exception as e:
-            logging.error(e)
-            return None
+        if bool(self.hd_digest):
+            return self.hd_digest.max_age
     
     @computed_field
     @cached_property
     def hd_content_length(self) -> Optional[str]:
-        try:
-            return self.hd_response.headers.get("content-length", None)
-        except Exception as e:
-            logging.error(e)
-            return None
+        if self.hd_digest is not None:
+            return self.hd_digest.headers.get("content-length", None)
+        return None
     
     @computed_field
     @cached_property
     def hd_xss_protection(self) -> Optional[str]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.hd_response.headers.get("x-xss-protection", None)
+        if bool(self.hd_digest):
+            return self.hd_digest.headers.get("x-xss-protection", None)
 
     @computed_field
     @cached_property
     def hd_x_content_type_options(self) -> Optional[str]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.hd_response.headers.get("x-content-type-options", None)
+        if bool(self.hd_digest):
+            return self.hd_digest.headers.get("x-content-type-options", None)
     
     @computed_field
     @cached_property
     def hd_x_last_modified(self) -> Optional[date]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.parse_date_string(self.hd_response.headers.get("last-modified", None))
+        if bool(self.hd_digest):
+            return self.hd_last_modified
+
     @computed_field
     @cached_property
     def hd_expires(self) -> Optional[date]:
-        try:
-            return self.parse_date_string(self.hd_response.headers.get("expires", None))
-        except Exception as e:
-            logging.error(e)
+        if self.hd_digest is not None:
+            return self.parse_date_string(self.hd_digest.headers.get("expires", None))
         return None
 
     
     @computed_field
     @cached_property
     def hd_num_header_params(self) -> Optional[int]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return len(self.hd_response.headers)
+        if bool(self.hd_digest):
+            if self.hd_digest.num_headers:
+                return self.hd_digest.num_headers
             
     @computed_field
     @cached_property
     def hd_header_entropy(self) -> Optional[float]:
-        if bool(self.hd_response):
-            if self.hd_response.headers:
-                return self.entropy("".join(self.hd_response.headers.values()))
+        if bool(self.hd_digest):
+            if self.hd_digest.num_headers:
+                return self.hd_digest.header_entropy
     
     @computed_field
     @cached_property
     def hd_num_redirects(self) -> Optional[int]:
-        if bool(self.hd_response):
-            if self.hd_response.history:
-                return len(self.hd_response.history) -1
+        if bool(self.hd_digest):
+            if self.hd_digest.num_history:
+                return self.hd_digest.num_history -1
     
     @computed_field
     @cached_property
     def hd_cookie_entropy(self) -> Optional[float]:
-        try:
-            return self.entropy("".join(self.hd_response.cookies.values()))
-        except Exception as e:
-            logging.error(e)
+        if self.hd_digest is not None:
+            return self.hd_digest.cookie_entropy
         return None
     
     @computed_field
     @cached_property
     def hd_num_cookie_params(self) -> Optional[int]:
-        if bool(self.hd_response):
-            if self.hd_response.cookies:
-                return len(self.hd_response.cookies)
+        if bool(self.hd_digest):
+            if self.hd_digest.num_cookies:
+                return self.hd_digest.num_cookies
 
 
     @computed_field
@@ -317,15 +283,14 @@ class HeaderFeatures(Feature):
     @computed_field
     @cached_property
     def hd_certificate_entropy(self) -> Optional[float]:
-        if bool(self.hd_certificate):
-            return self.entropy(self.certificate)
+        if bool(self.certificate):
+            return self.certificate.entropy
 
         
     @computed_field
     @cached_property
     def hd_certificate_num_extensions(self) -> int:
-        if bool(self.hd_certificate):
-            if bool(self.hd_certificate.extensions):
-                return len(self.hd_certificate.extensions)
+        if bool(self.certificate):
+            return self.certificate.num_extensions
         return 0
 
@@ -0,0 +1,58 @@
+import re
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Optional
+
+
+MONTHS = {
+    month: index for index, month in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+    )
+}
+
+# Sun, 06 Nov 1994 08:49:37 GMT
+IMF_FIXDATE = re.compile(
+    r"^[A-Za-z]{3}, (\d{2}) ([A-Za-z]{3}) (\d{4}) (\d{2}):(\d{2}):(\d{2}) GMT$"
+)
+# Sunday, 06-Nov-94 08:49:37 GMT
+RFC850_DATE = re.compile(
+    r"^[A-Za-z]{6,9}, (\d{2})-([A-Za-z]{3})-(\d{2}) (\d{2}):(\d{2}):(\d{2}) GMT$"
+)
+# Sun Nov  6 08:49:37 1994
+ASCTIME_DATE = re.compile(
+    r"^[A-Za-z]{3} ([A-Za-z]{3}) ([ \d]\d) (\d{2}):(\d{2}):(\d{2}) (\d{4})$"
+)
+
+
+def _build(year: int, month: str, day: int, hour: int, minute: int, second: int) -> Optional[datetime]:
+    try:
+        return datetime(
+            year, MONTHS[month.lower()], day, hour, minute, second, tzinfo=timezone.utc
+        )
+    except (KeyError, ValueError):
+        return None
+
+
+def _rfc850_year(year: int) -> int:
+    """RFC 7231 7.1.1.1: two digit years more than 50 years ahead are in the past."""
+    current = datetime.now(timezone.utc).year
+    year += current - current % 100
+    if year > current + 50:
+        year -= 100
+    return year
+
+
+@lru_cache(maxsize=4096)
+def parse_http_date(value: str) -> Optional[datetime]:
+    """Parse an RFC 7231 HTTP-date, None if it is in none of the three formats."""
+    value = value.strip()
+    if match := IMF_FIXDATE.match(value):
+        day, month, year, hour, minute, second = match.groups()
+        return _build(int(year), month, int(day), int(hour), int(minute), int(second))
+    if match := RFC850_DATE.match(value):
+        day, month, year, hour, minute, second = match.groups()
+        return _build(_rfc850_year(int(year)), month, int(day), int(hour), int(minute), int(second))
+    if match := ASCTIME_DATE.match(value):
+        month, day, hour, minute, second, year = match.groups()
+        return _build(int(year), month, int(day), int(hour), int(minute), int(second))
+    return None
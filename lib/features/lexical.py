@@ -40,7 +40,9 @@ class LexicalFeatures(Feature):
     
     @computed_field
     @cached_property
-    def lx_label(self) -> str:
+    def lx_label(self) -> Optional[str]:
+        if self.components.label is None:
+            return None
         return self.components.label.value
     
     @computed_field
@@ -66,6 +68,9 @@ class LexicalFeatures(Feature):
     @cached_property
     def lx_length_of_host(self) -> int:
         """Number of Characters in URL's Hostname."""
+        tokens = self.components.cp_tokens
+        if tokens.length(tokens.authority) > 0:
+            return tokens.length(tokens.authority)
         return len(self.components.cp_host)
     
     @computed_field
@@ -115,8 +120,21 @@ class LexicalFeatures(Feature):
     @computed_field
     @cached_property
     def lx_tld(self) -> str:
-        """Top Level Domain of the URL."""
-        return self.components.cp_host.split(".")[-1]
+        """Public Suffix of the URL, e.g. `co.uk`."""
+        parts = self.components.cp_host_parts
+        return parts.public_suffix or self.components.cp_hostname.split(".")[-1]
+
+    @computed_field
+    @cached_property
+    def lx_registered_domain(self) -> Optional[str]:
+        """Registered Domain of the URL, one label below the Public Suffix."""
+        return self.components.cp_host_parts.registered_domain
+
+    @computed_field
+    @cached_property
+    def lx_num_subdomains(self) -> int:
+        """Number of Labels left of the Registered Domain."""
+        return self.components.cp_host_parts.subdomain_count
     
     @computed_field
     @cached_property
@@ -134,7 +152,7 @@ class LexicalFeatures(Feature):
     @cached_property
     def lx_num_query_params(self) -> int:
         """Number of Parameters in the URL."""
-        return len(self.components.cp_query_params)
+        return self.components.cp_tokens.num_params
     
     @computed_field
     @cached_property
@@ -445,6 +463,6 @@ class LexicalFeatures(Feature):
     
     @computed_field
     @cached_property
-    def lx_special_chars(self):
+    def lx_special_chars(self) -> int:
         return len([i for i in self.lx_url_string if ord(i) > 127])
     
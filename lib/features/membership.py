@@ -0,0 +1,194 @@
+"""Memory-Mapped Blocklist and Allowlist Membership.
+
+A plain-text list (one host or domain per line, `#` comments, `rank,domain`
+CSV rows as in top-1M lists, or `0.0.0.0 domain` hosts-file lines as in DNS
+blocklists) is compiled offline into a sorted array of 64-bit hashes, 8
+bytes per entry. Indexes are memory-mapped read-only, so every worker process
+shares the same pages, and a batch of keys is looked up with a single
+`searchsorted`. A key that is not in the list
+matches with probability len(index) / 2**64.
+
+    python -m lib.features.membership blocklist.txt blocklist.npy
+"""
+import os
+import sys
+import logging
+import tempfile
+from hashlib import blake2b
+from ipaddress import ip_address
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from pydantic import computed_field
+
+from lib.features.base import Feature, URLComponent
+
+if TYPE_CHECKING:
+    import numpy as np
+    from lib.features.settings import MembershipSettings
+
+
+CHUNK = 1_000_000
+# Loopback names at the top of every hosts file, not list entries.
+HOSTS_NAMES = {"localhost", "localhost.localdomain", "local", "broadcasthost", "ip6-localhost", "ip6-loopback"}
+
+
+def key_hash(key: str) -> int:
+    """Stable 64-bit Hash of a normalized List Entry."""
+    return int.from_bytes(blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+
+
+def normalize(line: str) -> Optional[str]:
+    """Host or Domain of a List Line, or None for blanks and comments."""
+    entry = line.split("#", 1)[0].strip().rsplit(",", 1)[-1].strip().lower().rstrip(".")
+    return entry.removeprefix("www.") or None
+
+
+def is_ip(value: str) -> bool:
+    try:
+        ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def entries(line: str) -> list[str]:
+    """Normalized Entries of a List Line: one, or the host names of a hosts-file line."""
+    fields = line.split("#", 1)[0].split()
+    if len(fields) > 1 and is_ip(fields[0]):
+        hosts = map(normalize, fields[1:])
+        return [host for host in hosts if host is not None and host not in HOSTS_NAMES and not is_ip(host)]
+    entry = normalize(line)
+    return [] if entry is None else [entry]
+
+
+def build_index(lines: Iterable[str], target: str) -> int:
+    """Compile List Lines into a sorted Hash Index at `target`, returning its size."""
+    import numpy as np
+
+    chunks, chunk = [], []
+    for line in lines:
+        chunk.extend(map(key_hash, entries(line)))
+        if len(chunk) >= CHUNK:
+            chunks.append(np.unique(np.array(chunk, dtype=np.uint64)))
+            chunk = []
+    chunks.append(np.array(chunk, dtype=np.uint64))
+    hashes = np.unique(np.concatenate(chunks))
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".", suffix=".tmp.npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, hashes)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(hashes)
+
+
+class MembershipIndex:
+    """Read-Only Set Membership over a memory-mapped sorted Hash Array."""
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        self.path = path
+        self.hashes = np.load(path, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Probability that a Key not in the List is reported as a member."""
+        return len(self.hashes) / 2 ** 64
+
+    def contains(self, keys: Iterable[str]) -> "np.ndarray":
+        """Membership of every Key as a boolean array, in one vectorized lookup."""
+        import numpy as np
+
+        hashes = np.fromiter((key_hash(normalize(key) or "") for key in keys), dtype=np.uint64)
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes)
+        return self.hashes[np.minimum(positions, len(self.hashes) - 1)] == hashes
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.contains([key])[0])
+
+
+@lru_cache(maxsize=None)
+def membership_settings() -> "MembershipSettings":
+    from lib.features.settings import MembershipSettings
+    return MembershipSettings()
+
+
+@lru_cache(maxsize=None)
+def load_index(path: Optional[str]) -> Optional[MembershipIndex]:
+    """Process-wide Index for a Path, or None when no list is configured."""
+    if path is None:
+        return None
+    if not os.path.exists(path):
+        logging.error(f"Membership index {path} does not exist.")
+        return None
+    index = MembershipIndex(path)
+    logging.info(f"Loaded {len(index)} entries from {path}, false positive rate {index.false_positive_rate:.2e}.")
+    return index
+
+
+class ListFeatures(Feature):
+    """Blocklist and Allowlist Membership of the Hostname and Registered Domain.
+
+    Each field is None when its list is not configured.
+    """
+    components: URLComponent
+
+    @cached_property
+    def keys(self) -> list[str]:
+        host = self.components.cp_hostname
+        return [host, self.components.cp_host_parts.registered_domain or host]
+
+    def _lookup(self, path: Optional[str]) -> Optional[list[bool]]:
+        index = load_index(path)
+        return None if index is None else index.contains(self.keys).tolist()
+
+    @cached_property
+    def blocklisted(self) -> Optional[list[bool]]:
+        return self._lookup(membership_settings().blocklist_path)
+
+    @cached_property
+    def allowlisted(self) -> Optional[list[bool]]:
+        return self._lookup(membership_settings().allowlist_path)
+
+    @computed_field
+    @cached_property
+    def ls_blocklisted_host(self) -> Optional[bool]:
+        """Hostname appears in the Blocklist."""
+        return None if self.blocklisted is None else self.blocklisted[0]
+
+    @computed_field
+    @cached_property
+    def ls_blocklisted_domain(self) -> Optional[bool]:
+        """Registered Domain appears in the Blocklist."""
+        return None if self.blocklisted is None else self.blocklisted[1]
+
+    @computed_field
+    @cached_property
+    def ls_allowlisted_host(self) -> Optional[bool]:
+        """Hostname appears in the Allowlist."""
+        return None if self.allowlisted is None else self.allowlisted[0]
+
+    @computed_field
+    @cached_property
+    def ls_allowlisted_domain(self) -> Optional[bool]:
+        """Registered Domain appears in the Allowlist."""
+        return None if self.allowlisted is None else self.allowlisted[1]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m lib.features.membership <list.txt> <index.npy>")
+    with open(sys.argv[1], encoding="utf-8", errors="replace") as f:
+        size = build_index(f, sys.argv[2])
+    print(f"Wrote {size} entries to {sys.argv[2]}, false positive rate {size / 2 ** 64:.2e}.")
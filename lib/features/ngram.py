@@ -0,0 +1,142 @@
+import re
+from zlib import crc32
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+from pydantic import BaseModel, computed_field
+
+from lib.features.base import Feature, URLComponent
+from lib.features.tokenize import tokenize
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+
+TOKEN = re.compile(r"[A-Za-z0-9]+")
+PRIME = np.uint64(1099511628211)
+GOLDEN = 0x9E3779B97F4A7C15
+MASK64 = 0xFFFFFFFFFFFFFFFF
+HOST, PATH = 1, 2
+
+
+def fmix64(h: np.ndarray) -> np.ndarray:
+    """MurmurHash3 64-bit finalizer, spreads rolling hashes over all bits."""
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xFF51AFD7ED558CCD)
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xC4CEB9FE1A85EC53)
+    return h ^ (h >> np.uint64(33))
+
+
+def salt(namespace: int, n: int) -> np.uint64:
+    """Seed of the `n`-grams of a namespace, n=0 for tokens."""
+    return np.uint64(GOLDEN * (namespace << 8 | n) & MASK64)
+
+
+def split_url(url: str) -> tuple[str, str]:
+    """Host of a URL and the rest of it after the authority: path, query and fragment."""
+    tokens = tokenize(url)
+    if tokens.host[0] < 0:
+        tokens = tokenize(f"//{url}")
+    return tokens.component(tokens.host), tokens.url[tokens.path[0]:]
+
+
+class HashedNGramVectorizer(BaseModel):
+    """Hashing-Trick Vectorizer for character n-grams and host/path tokens.
+
+    Every n-gram and token is hashed into one of `width` columns with a
+    hash-derived sign, so memory is fixed by the width no matter how many
+    distinct n-grams the corpus holds. Hashes are stable across processes.
+    The host and the rest of the URL are hashed in separate namespaces, so
+    `paypal` in a host and in a path are different features.
+    """
+    width: int = 2 ** 18
+    ngram_min: int = 3
+    ngram_max: int = 5
+    tokens: bool = True
+    lowercase: bool = True
+    normalize: bool = True
+
+    def _char_ngrams(self, urls: list[str], namespace: int) -> tuple[np.ndarray, np.ndarray]:
+        """(row, hash) of every character n-gram, hashed in one vectorized pass per n."""
+        encoded = [url.encode("utf-8", "surrogatepass") for url in urls]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        ends = np.cumsum(lengths)
+        rows_of = np.repeat(np.arange(len(urls)), lengths)
+
+        rows, hashes = [], []
+        for n in range(self.ngram_min, self.ngram_max + 1):
+            count = len(data) - n + 1
+            if count <= 0:
+                continue
+            h = np.zeros(count, dtype=np.uint64)
+            for k in range(n):
+                h = h * PRIME + data[k:k + count]
+            starts = np.arange(count)
+            valid = starts + n <= ends[rows_of[:count]]
+            rows.append(rows_of[:count][valid])
+            hashes.append(fmix64(h[valid] ^ salt(namespace, n)))
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+        return np.concatenate(rows), np.concatenate(hashes)
+
+    def _tokens(self, urls: list[str], namespace: int) -> tuple[np.ndarray, np.ndarray]:
+        """(row, hash) of every alphanumeric token."""
+        rows, hashes = [], []
+        for row, url in enumerate(urls):
+            for token in TOKEN.findall(url):
+                rows.append(row)
+                hashes.append(crc32(token.encode(), 0x5EED))
+        return (
+            np.asarray(rows, dtype=np.int64),
+            fmix64(np.asarray(hashes, dtype=np.uint64) ^ salt(namespace, 0)),
+        )
+
+    def transform(self, urls: Iterable[str]) -> "csr_matrix":
+        """Hashed Feature Vectors of a batch of URLs as an (n, width) CSR matrix."""
+        from scipy.sparse import coo_matrix
+
+        urls = [url.lower() if self.lowercase else url for url in urls]
+        hosts, paths = zip(*map(split_url, urls)) if urls else ((), ())
+        parts = [self._char_ngrams(list(hosts), HOST), self._char_ngrams(list(paths), PATH)]
+        if self.tokens:
+            parts += [self._tokens(list(hosts), HOST), self._tokens(list(paths), PATH)]
+        rows = np.concatenate([part_rows for part_rows, _ in parts])
+        hashes = np.concatenate([part_hashes for _, part_hashes in parts])
+
+        cols = (hashes % np.uint64(self.width)).astype(np.int64)
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0).astype(np.float32)
+        matrix = coo_matrix((signs, (rows, cols)), shape=(len(urls), self.width)).tocsr()
+        matrix.sum_duplicates()
+        if self.normalize:
+            norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+            norms[norms == 0] = 1
+            matrix = matrix.multiply(1 / norms[:, None]).tocsr()
+        return matrix.astype(np.float32)
+
+
+class NGramFeatures(Feature):
+    """Hashed character n-gram and token vector of the resolved URL, in sparse form."""
+    components: URLComponent
+
+    @cached_property
+    def vectorizer(self) -> HashedNGramVectorizer:
+        return HashedNGramVectorizer()
+
+    @cached_property
+    def ng_vector(self) -> "csr_matrix":
+        return self.vectorizer.transform([self.components.cp_resolved])
+
+    @computed_field
+    @cached_property
+    def ng_indices(self) -> list[int]:
+        """Non-zero Columns of the Hashed Vector."""
+        return self.ng_vector.indices.tolist()
+
+    @computed_field
+    @cached_property
+    def ng_values(self) -> list[float]:
+        """Values of the Non-zero Columns of the Hashed Vector."""
+        return self.ng_vector.data.tolist()
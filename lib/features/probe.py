@@ -0,0 +1,355 @@
+import logging
+from random import uniform
+from time import monotonic, sleep
+from threading import Lock
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import cached_property, lru_cache, partial
+from typing import TYPE_CHECKING, Any, Callable, Optional
+from urllib.parse import urljoin, urlsplit
+
+from pydantic import BaseModel, PrivateAttr
+
+if TYPE_CHECKING:
+    from lib.features.settings import ProbeSettings
+
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+RETRY_CODES = (429, 500, 502, 503, 504)
+
+
+class Hop(BaseModel):
+    """A single HEAD request/response in a Redirect Chain."""
+    class Config:
+        frozen = True
+
+    url: str
+    status_code: int
+    location: Optional[str] = None
+    headers: dict[str, str] = {}
+    cookies: dict[str, str] = {}
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def is_redirect(self) -> bool:
+        return self.status_code in REDIRECT_CODES and bool(self.location)
+
+    def __bool__(self) -> bool:
+        """Truthiness mirrors `requests.Response`, i.e. False for 4xx/5xx."""
+        return self.ok
+
+
+class HopCache(BaseModel):
+    """Thread-safe LRU cache of Hops with a TTL, keyed by request URL.
+
+    Entries are also bucketed by the registered domain of their URL, and a
+    domain holding `domain_maxsize` entries evicts its own least recently
+    used one, so a single tracker minting unique redirect URLs cannot
+    flush every other site from the cache.
+    """
+    ttl: float
+    maxsize: int
+    domain_maxsize: Optional[int] = None
+    _entries: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _domains: dict[str, OrderedDict] = PrivateAttr(default_factory=dict)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    @staticmethod
+    def domain(url: str) -> str:
+        from lib.features.suffix import split_host
+
+        host = (urlsplit(url).hostname or "").lower()
+        return split_host(host).registered_domain or host
+
+    def _drop(self, url: str) -> None:
+        stored, hop, domain = self._entries.pop(url)
+        bucket = self._domains[domain]
+        del bucket[url]
+        if not bucket:
+            del self._domains[domain]
+
+    def get(self, url: str) -> Optional[Hop]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            stored, hop, domain = entry
+            if monotonic() - stored > self.ttl:
+                self._drop(url)
+                return None
+            self._entries.move_to_end(url)
+            self._domains[domain].move_to_end(url)
+            return hop
+
+    def put(self, url: str, hop: Hop) -> None:
+        domain = self.domain(url)
+        with self._lock:
+            if url in self._entries:
+                self._drop(url)
+            bucket = self._domains.setdefault(domain, OrderedDict())
+            if self.domain_maxsize is not None and len(bucket) >= self.domain_maxsize:
+                self._drop(next(iter(bucket)))
+                bucket = self._domains.setdefault(domain, OrderedDict())
+            self._entries[url] = (monotonic(), hop, domain)
+            bucket[url] = None
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Coalescer(BaseModel):
+    """Share one in-flight call between all concurrent callers with the same key."""
+    _flights: dict[str, Future] = PrivateAttr(default_factory=dict)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    def run(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = Future()
+
+        if not owner:
+            return flight.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+class RetryPolicy(BaseModel):
+    """Retries and Hedging of single Hop requests.
+
+    Connection errors, timeouts and `retry_statuses` are retried up to
+    `retries` times, after a full-jitter exponential backoff (or the
+    server's Retry-After, when shorter than `backoff_max`). Every request
+    earns `budget_ratio` retry tokens up to `budget_reserve`, and every
+    retry or hedge spends one, so an unhealthy run degrades to single
+    attempts instead of multiplying its load.
+
+    With `hedge` set, an attempt still running after the observed
+    `hedge_quantile` latency is raced against a second request, and the
+    first response wins.
+    """
+    retries: int = 2
+    backoff: float = 0.1
+    backoff_max: float = 2.0
+    retry_statuses: tuple[int, ...] = RETRY_CODES
+    budget_ratio: float = 0.2
+    budget_reserve: float = 10
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 50
+    hedge_workers: int = 128
+    _tokens: Optional[float] = PrivateAttr(default=None)
+    _latencies: deque = PrivateAttr(default_factory=lambda: deque(maxlen=1024))
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    @cached_property
+    def counts(self) -> Counter:
+        return Counter()
+
+    @cached_property
+    def executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.hedge_workers)
+
+    def _deposit(self) -> None:
+        with self._lock:
+            tokens = self.budget_reserve if self._tokens is None else self._tokens
+            self._tokens = min(tokens + self.budget_ratio, self.budget_reserve)
+            self.counts["requests"] += 1
+
+    def _withdraw(self, kind: str) -> bool:
+        """Spend a Retry Token, False once the budget is exhausted."""
+        with self._lock:
+            if self._tokens is None or self._tokens < 1:
+                self.counts["budget_exhausted"] += 1
+                return False
+            self._tokens -= 1
+            self.counts[kind] += 1
+            return True
+
+    @staticmethod
+    def retryable(error: Exception) -> bool:
+        from requests.exceptions import ConnectionError, Timeout
+
+        return isinstance(error, (ConnectionError, Timeout))
+
+    def delay(self, attempt: int, hop: Optional[Hop] = None) -> float:
+        retry_after = (hop.headers.get("retry-after") or "") if hop is not None else ""
+        if retry_after.isdigit() and int(retry_after) <= self.backoff_max:
+            return float(retry_after)
+        return uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def hedge_delay(self) -> Optional[float]:
+        """Observed `hedge_quantile` Latency, None until enough samples or when not hedging."""
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(int(self.hedge_quantile * len(latencies)), len(latencies) - 1)]
+
+    def _timed(self, fetch: Callable[[str, int], Hop], url: str, timeout: int) -> Hop:
+        """Fetch and record the latency. Timeouts and failures are recorded at their
+        elapsed time, as censored samples, so a slow tail that never answers still
+        pulls the hedge delay up instead of vanishing from the window."""
+        start = monotonic()
+        try:
+            return fetch(url, timeout)
+        finally:
+            with self._lock:
+                self._latencies.append(monotonic() - start)
+
+    def _attempt(self, fetch: Callable[[str, int], Hop], url: str, timeout: int) -> Hop:
+        threshold = self.hedge_delay()
+        if threshold is None:
+            return self._timed(fetch, url, timeout)
+
+        primary = self.executor.submit(self._timed, fetch, url, timeout)
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._withdraw("hedges"):
+            return primary.result()
+
+        hedge = self.executor.submit(self._timed, fetch, url, timeout)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.counts["hedge_wins"] += future is hedge
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def fetch(self, url: str, timeout: int, fetch: Optional[Callable[[str, int], Hop]] = None) -> Hop:
+        """Fetch a Hop under the Policy, raising the last error once retries run out."""
+        fetch = fetch_hop if fetch is None else fetch
+        self._deposit()
+        attempt = 0
+        while True:
+            hop = None
+            try:
+                hop = self._attempt(fetch, url, timeout)
+                if hop.status_code not in self.retry_statuses:
+                    return hop
+                if attempt >= self.retries or not self._withdraw("retries"):
+                    return hop
+            except Exception as e:
+                if not self.retryable(e) or attempt >= self.retries or not self._withdraw("retries"):
+                    raise
+                logging.info(f"Retrying request to {url} after {e}.")
+            sleep(self.delay(attempt, hop))
+            attempt += 1
+
+
+@lru_cache(maxsize=None)
+def probe_settings() -> "ProbeSettings":
+    from lib.features.settings import ProbeSettings
+    return ProbeSettings()
+
+
+@lru_cache(maxsize=None)
+def shared_hop_cache() -> HopCache:
+    """Process-wide Hop Cache, created on first use."""
+    settings = probe_settings()
+    return HopCache(
+        ttl=settings.hop_cache_ttl, maxsize=settings.hop_cache_size, domain_maxsize=settings.hop_cache_domain_size
+    )
+
+
+@lru_cache(maxsize=None)
+def shared_retry_policy() -> RetryPolicy:
+    """Process-wide Retry Policy, so the budget and latency samples span the run."""
+    settings = probe_settings()
+    return RetryPolicy(
+        retries=settings.probe_retries,
+        backoff=settings.probe_backoff,
+        backoff_max=settings.probe_backoff_max,
+        budget_ratio=settings.probe_retry_budget,
+        hedge=settings.probe_hedge,
+        hedge_quantile=settings.probe_hedge_quantile,
+    )
+
+
+probe_flights = Coalescer()
+certificate_flights = Coalescer()
+
+
+def fetch_hop(url: str, timeout: int, cookies: Optional[dict[str, str]] = None) -> Hop:
+    """Make a single HEAD request to a URL without following redirects."""
+    from requests import head
+
+    response = head(
+        url, allow_redirects=False, headers={'user-agent': 'Mozilla/5.0'}, cookies=cookies, timeout=timeout
+    )
+    return Hop(
+        url=response.url,
+        status_code=response.status_code,
+        location=response.headers.get("location"),
+        headers={k.lower(): v for k, v in response.headers.items()},
+        cookies=response.cookies.get_dict(),
+        elapsed=response.elapsed.total_seconds(),
+    )
+
+
+def follow(
+        url: str, timeout: Optional[int] = None, cache: Optional[HopCache] = None,
+        policy: Optional[RetryPolicy] = None
+    ) -> list[Hop]:
+    """Follow a Redirect Chain one Hop at a time, serving known redirects from the cache.
+
+    Cookies set by a hop are sent on later requests to the same host, as a
+    browser would, so cookie-gated chains resolve the same way. Only redirect
+    hops are cached, keyed by URL and the cookies sent with it: final
+    responses, including transient errors, are fetched again next time.
+    Returns the full chain, final response last, or an empty list if any hop fails.
+    """
+    settings = probe_settings()
+    timeout = settings.probe_timeout if timeout is None else timeout
+    cache = shared_hop_cache() if cache is None else cache
+    policy = shared_retry_policy() if policy is None else policy
+    chain, seen, jar = [], set(), {}
+    while True:
+        host = urlsplit(url).hostname or ""
+        cookies = jar.get(host)
+        key = url if not cookies else f"{url}\0{sorted(cookies.items())}"
+        if len(chain) > settings.probe_max_hops or key in seen:
+            logging.error(f"Error making request to {chain[0].url}: redirect loop or too many redirects.")
+            return []
+        seen.add(key)
+
+        hop = cache.get(key)
+        if hop is None:
+            try:
+                hop = policy.fetch(url, timeout, partial(fetch_hop, cookies=cookies) if cookies else None)
+            except Exception as e:
+                logging.error(f"Error making request to {url}: {e}")
+                return []
+            if hop.is_redirect:
+                cache.put(key, hop)
+        chain.append(hop)
+        if hop.cookies:
+            jar[host] = {**jar.get(host, {}), **hop.cookies}
+
+        if not hop.is_redirect:
+            logging.info(f"Request to {chain[0].url} was successful with {hop.status_code}.")
+            return chain
+        url = urljoin(hop.url, hop.location)
@@ -0,0 +1,24 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings
+
+
+class ProbeSettings(BaseSettings):
+    """Probe Layer Settings."""
+    probe_timeout: int = 3
+    probe_max_hops: int = 30
+    hop_cache_ttl: float = 3600
+    hop_cache_size: int = 100_000
+    hop_cache_domain_size: int = 1_000
+    probe_retries: int = 2
+    probe_backoff: float = 0.1
+    probe_backoff_max: float = 2.0
+    probe_retry_budget: float = 0.2
+    probe_hedge: bool = False
+    probe_hedge_quantile: float = 0.95
+
+
+class MembershipSettings(BaseSettings):
+    """Blocklist and Allowlist Index Paths, built with `python -m lib.features.membership`."""
+    blocklist_path: Optional[str] = None
+    allowlist_path: Optional[str] = None
@@ -0,0 +1,204 @@
+"""Compiled Public Suffix List.
+
+The bundled `data/public_suffix_list.dat` (https://publicsuffix.org, MPL 2.0)
+is compiled into a reversed-label trie stored as one flat structured array:
+the children of a node are contiguous and sorted by label hash, so a lookup
+is one binary search per host label. The compiled `.npy` sits next to the
+list and is memory-mapped read-only, so every worker process on a machine
+shares the same pages.
+
+    python -m lib.features.suffix [public_suffix_list.dat]   # recompile
+"""
+import os
+import sys
+import logging
+import tempfile
+from zlib import crc32
+from collections import deque
+from ipaddress import ip_address
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "public_suffix_list.dat")
+
+RULE, WILDCARD, EXCEPTION = 1, 2, 4
+NODE = [("hash", "<u8"), ("first", "<u4"), ("count", "<u4"), ("flags", "u1")]
+
+
+class HostParts(NamedTuple):
+    public_suffix: Optional[str]
+    registered_domain: Optional[str]
+    subdomain_count: int
+
+
+def label_hash(label: str) -> int:
+    """Stable 64-bit Hash of a Domain Label."""
+    data = label.encode("utf-8", "surrogatepass")
+    return crc32(data) | crc32(data, 0x5EED) << 32
+
+
+def _labels(rule: str) -> list[str]:
+    """Labels of a Rule, with the IDNA (punycode) form when it differs."""
+    forms = [rule]
+    try:
+        ascii_rule = rule.replace("*", "x").encode("idna").decode()
+        ascii_rule = ".".join(
+            "*" if original == "*" else label
+            for original, label in zip(rule.split("."), ascii_rule.split("."))
+        )
+        if ascii_rule != rule:
+            forms.append(ascii_rule)
+    except UnicodeError:
+        pass
+    return forms
+
+
+def compile_suffix_list(source: str = DATA, target: Optional[str] = None) -> str:
+    """Compile a Public Suffix List into a flat Trie Array, returning its path."""
+    import numpy as np
+
+    target = target or f"{source}.npy"
+    trie = {}
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            rule = line.strip().split(" ")[0].lower()
+            if not rule or rule.startswith("//"):
+                continue
+            exception = rule.startswith("!")
+            for form in _labels(rule.lstrip("!")):
+                node = trie
+                labels = form.split(".")[::-1]
+                for label in labels[:-1]:
+                    node = node.setdefault(label, {})
+                last = node.setdefault(labels[-1], {})
+                if labels[-1] == "*":
+                    node[""] = node.get("", 0) | WILDCARD
+                    del node["*"]
+                else:
+                    last[""] = last.get("", 0) | (EXCEPTION if exception else RULE)
+
+    # Breadth-first, so the children of every node land next to each other.
+    rows, queue = [[0, 0, 0, trie.get("", 0)]], deque([(0, trie)])
+    while queue:
+        index, node = queue.popleft()
+        children = sorted(
+            ((label_hash(label), child) for label, child in node.items() if label), key=lambda item: item[0]
+        )
+        rows[index][1], rows[index][2] = len(rows), len(children)
+        for h, child in children:
+            queue.append((len(rows), child))
+            rows.append([h, 0, 0, child.get("", 0)])
+
+    array = np.array([tuple(row) for row in rows], dtype=NODE)
+    # Workers on a fresh checkout compile at the same time: each writes its own
+    # temp file and renames it into place, so readers never see a partial one.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".", suffix=".tmp.npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return target
+
+
+class SuffixTrie:
+    """Memory-Mapped Public Suffix Trie."""
+
+    def __init__(self, nodes: "np.ndarray"):
+        self.nodes = nodes
+        self.hashes = nodes["hash"]
+        self.first = nodes["first"]
+        self.count = nodes["count"]
+        self.flags = nodes["flags"]
+
+    @classmethod
+    def load(cls, source: str = DATA) -> "SuffixTrie":
+        import numpy as np
+
+        compiled = f"{source}.npy"
+        if not os.path.exists(compiled) or os.path.getmtime(compiled) < os.path.getmtime(source):
+            try:
+                compile_suffix_list(source, compiled)
+            except OSError as e:
+                # e.g. a read-only install: share one copy per list version in the temp dir.
+                logging.error(f"Error writing compiled suffix list {compiled}: {e}")
+                compiled = cls.fallback_path(source)
+                if not os.path.exists(compiled):
+                    compile_suffix_list(source, compiled)
+        return cls(np.load(compiled, mmap_mode="r"))
+
+    @staticmethod
+    def fallback_path(source: str) -> str:
+        """Compiled List in the temp dir, named after the hash of the Source and NODE layout."""
+        from hashlib import sha1
+
+        digest = sha1(repr(NODE).encode())
+        with open(source, "rb") as f:
+            digest.update(f.read())
+        return os.path.join(tempfile.gettempdir(), f"urlprint-psl-{digest.hexdigest()[:16]}.npy")
+
+    def _child(self, node: int, label: str) -> int:
+        import numpy as np
+
+        first, count = int(self.first[node]), int(self.count[node])
+        if count == 0:
+            return -1
+        h = label_hash(label)
+        siblings = self.hashes[first:first + count]
+        i = int(np.searchsorted(siblings, np.uint64(h)))
+        if i < count and int(siblings[i]) == h:
+            return first + i
+        return -1
+
+    def suffix_labels(self, labels: list[str]) -> int:
+        """Number of trailing Labels that form the Public Suffix."""
+        node, suffix = 0, 1
+        for depth, label in enumerate(reversed(labels), 1):
+            child = self._child(node, label)
+            if child >= 0 and self.flags[child] & EXCEPTION:
+                return depth - 1
+            if self.flags[node] & WILDCARD:
+                suffix = depth
+            if child < 0:
+                break
+            if self.flags[child] & RULE:
+                suffix = depth
+            node = child
+        return suffix
+
+    def split(self, host: str) -> HostParts:
+        """Public Suffix, Registered Domain and Subdomain count of a Hostname."""
+        host = host.lower().strip("[]").rstrip(".")
+        if not host:
+            return HostParts(None, None, 0)
+        try:
+            ip_address(host)
+            return HostParts(None, None, 0)
+        except ValueError:
+            pass
+        labels = host.split(".")
+        suffix = min(self.suffix_labels(labels), len(labels))
+        registered = ".".join(labels[-suffix - 1:]) if len(labels) > suffix else None
+        return HostParts(".".join(labels[-suffix:]), registered, max(len(labels) - suffix - 1, 0))
+
+
+@lru_cache(maxsize=None)
+def suffix_trie() -> SuffixTrie:
+    """Process-wide Suffix Trie, loaded on first use."""
+    return SuffixTrie.load()
+
+
+@lru_cache(maxsize=65536)
+def split_host(host: str) -> HostParts:
+    return suffix_trie().split(host)
+
+
+if __name__ == "__main__":
+    print(compile_suffix_list(*sys.argv[1:2]))
@@ -0,0 +1,132 @@
+import re
+from array import array
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+SCHEME = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:")
+
+# Column layout of `tokenize_batch`; spans are (start, end), (-1, -1) when absent.
+COLUMNS = (
+    "scheme_end",
+    "authority_start", "authority_end",
+    "userinfo_start", "userinfo_end",
+    "host_start", "host_end",
+    "port_start", "port_end",
+    "path_start", "path_end",
+    "query_start", "query_end",
+    "fragment_start", "fragment_end",
+    "num_params",
+)
+
+
+class URLTokens:
+    """Offsets of every Component of a URL, recorded in a single left-to-right pass.
+
+    Nothing is sliced out of the URL: lengths and counts come straight from
+    the offsets, and `component(span)` slices only on demand. Query
+    parameters and path segments are flat (start, end) pairs.
+    """
+    __slots__ = (
+        "url", "scheme_end", "authority", "userinfo", "host", "port",
+        "path", "query", "fragment", "params", "segments",
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        n = len(url)
+        self.scheme_end = -1
+        self.authority = self.userinfo = self.host = self.port = (-1, -1)
+        self.query = self.fragment = (-1, -1)
+        self.params = array("i")
+        self.segments = array("i")
+
+        i = 0
+        if match := SCHEME.match(url):
+            self.scheme_end = match.end() - 1
+            i = match.end()
+
+        # Delimiters are located with str.find, which scans in C.
+        fragment = url.find("#", i)
+        end = n if fragment < 0 else fragment
+        query = url.find("?", i, end)
+        end = end if query < 0 else query
+
+        if url.startswith("//", i):
+            start = i = i + 2
+            slash = url.find("/", i, end)
+            i = end if slash < 0 else slash
+            self.authority = (start, i)
+            at = url.rfind("@", start, i)
+            host_start = start if at < 0 else at + 1
+            if at >= 0:
+                self.userinfo = (start, at)
+            colon = url.rfind(":", host_start, i)
+            if colon > url.rfind("]", host_start, i):
+                self.host = (host_start, colon)
+                self.port = (colon + 1, i)
+            else:
+                self.host = (host_start, i)
+
+        self.path = (i, end)
+        self._spans(self.segments, "/", i, end)
+
+        if query >= 0:
+            end = n if fragment < 0 else fragment
+            self.query = (query + 1, end)
+            self._spans(self.params, "&", query + 1, end)
+
+        if fragment >= 0:
+            self.fragment = (fragment + 1, n)
+
+    def _spans(self, spans: array, sep: str, start: int, end: int) -> None:
+        """Record the non-empty spans between separators in url[start:end]."""
+        url = self.url
+        while start < end:
+            stop = url.find(sep, start, end)
+            if stop < 0:
+                stop = end
+            if stop > start:
+                spans.extend((start, stop))
+            start = stop + 1
+
+    @staticmethod
+    def length(span: tuple[int, int]) -> int:
+        return span[1] - span[0]
+
+    @property
+    def num_params(self) -> int:
+        return len(self.params) // 2
+
+    @property
+    def num_segments(self) -> int:
+        return len(self.segments) // 2
+
+    def component(self, span: tuple[int, int]) -> str:
+        return self.url[span[0]:span[1]] if span[0] >= 0 else ""
+
+    def param_spans(self) -> Iterable[tuple[int, int]]:
+        return zip(self.params[::2], self.params[1::2])
+
+    def segment_spans(self) -> Iterable[tuple[int, int]]:
+        return zip(self.segments[::2], self.segments[1::2])
+
+    def row(self) -> tuple[int, ...]:
+        return (
+            self.scheme_end, *self.authority, *self.userinfo, *self.host, *self.port,
+            *self.path, *self.query, *self.fragment, self.num_params,
+        )
+
+
+def tokenize(url: str) -> URLTokens:
+    return URLTokens(url)
+
+
+def tokenize_batch(urls: Iterable[str]) -> "np.ndarray":
+    """Component Offsets of many URLs as an (n, len(COLUMNS)) int32 array."""
+    import numpy as np
+
+    rows = [URLTokens(url).row() for url in urls]
+    return np.array(rows, dtype=np.int32).reshape(len(rows), len(COLUMNS))
@@ -0,0 +1,63 @@
+import json
+import argparse
+from asyncio import open_connection, gather, run, Queue
+from time import perf_counter
+
+import numpy as np
+
+
+async def client(host: str, port: int, path: str, queue: Queue, latencies: list[float]) -> None:
+    """Send queued request bodies over one keep-alive connection."""
+    reader, writer = await open_connection(host, port)
+    while not queue.empty():
+        body = queue.get_nowait()
+        request = (
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode() + body
+        start = perf_counter()
+        writer.write(request)
+        await writer.drain()
+        length = 0
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(perf_counter() - start)
+    writer.close()
+
+
+async def main(args: argparse.Namespace) -> None:
+    with open(args.urls) as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    queue = Queue()
+    for i in range(args.requests):
+        batch = [urls[(i * args.batch + j) % len(urls)] for j in range(args.batch)]
+        queue.put_nowait(json.dumps({"urls": batch}).encode())
+
+    latencies = []
+    path = f"/score?tier={args.tier}&format={args.format}"
+    start = perf_counter()
+    await gather(*[client(args.host, args.port, path, queue, latencies) for _ in range(args.concurrency)])
+    elapsed = perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    print(
+        f"requests={len(ms)} urls={len(ms) * args.batch} elapsed={elapsed:.2f}s "
+        f"rps={len(ms) / elapsed:.1f} p50={np.percentile(ms, 50):.3f}ms "
+        f"p99={np.percentile(ms, 99):.3f}ms max={ms.max():.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the scoring service.")
+    parser.add_argument("urls", help="File with one URL per line.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tier", choices=["lexical", "network"], default="lexical")
+    parser.add_argument("--format", choices=["json", "binary"], default="json")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=1)
+    run(main(parser.parse_args()))
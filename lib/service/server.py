@@ -0,0 +1,191 @@
+import json
+import logging
+from asyncio import StreamReader, StreamWriter, start_server, wait_for, wrap_future, run, gather
+from asyncio import TimeoutError as AsyncTimeoutError
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property
+from threading import Lock
+from time import perf_counter
+from typing import Any
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+from pydantic import PrivateAttr
+from pydantic_settings import BaseSettings
+
+from lib.data.cache import numeric_keys
+from lib.data.extract import FeatureExtractor
+from lib.features.base import URLComponent
+from lib.features.lexical import LexicalFeatures
+from lib.features.header import HeaderFeatures
+
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class ScoringService(BaseSettings):
+    """Online Feature Scoring Service.
+
+    `POST /score?tier=lexical|network&format=json|binary` with a body of
+    `{"url": ...}` or `{"urls": [...]}`. The lexical tier never touches the
+    network; the network tier adds HeaderFeatures within `service_budget`
+    seconds per request, returning nulls for URLs that did not finish in time.
+    At most `service_max_pending` network URLs may be queued or running in the
+    pool, further network requests are answered with 503 until it drains.
+    Probe and hop caches are process-wide, so they stay warm across requests.
+    """
+    service_host: str = "127.0.0.1"
+    service_port: int = 8080
+    service_budget: float = 2.0
+    service_max_batch: int = 64
+    service_workers: int = 64
+    service_max_pending: int = 256
+    _pending: int = PrivateAttr(default=0)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    @cached_property
+    def executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.service_workers)
+
+    @cached_property
+    def lexical_keys(self) -> list[str]:
+        return numeric_keys([LexicalFeatures])
+
+    @cached_property
+    def network_keys(self) -> list[str]:
+        return numeric_keys([LexicalFeatures, HeaderFeatures])
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    @staticmethod
+    def score_lexical(url: str) -> dict[str, Any]:
+        components = URLComponent(url=url, offline=True)
+        return FeatureExtractor.extract_features([LexicalFeatures(components=components)])
+
+    @staticmethod
+    def score_network(url: str) -> dict[str, Any]:
+        components = URLComponent(url=url)
+        return FeatureExtractor.extract_features([
+            LexicalFeatures(components=components), HeaderFeatures(components=components)
+        ])
+
+    async def score(self, urls: list[str], network: bool) -> list[dict[str, Any]]:
+        if not network:
+            return [self.score_lexical(url) for url in urls]
+
+        futures = [self.executor.submit(self.score_network, url) for url in urls]
+        with self._lock:
+            self._pending += len(futures)
+        for future in futures:
+            future.add_done_callback(self._release)
+        try:
+            await wait_for(gather(*map(wrap_future, futures), return_exceptions=True), self.service_budget)
+        except AsyncTimeoutError:
+            logging.info(f"Network tier exceeded its {self.service_budget}s budget.")
+        for future in futures:
+            # Queued probes are dropped, running ones finish in the pool and warm the caches.
+            future.cancel()
+
+        results = []
+        for url, future in zip(urls, futures):
+            if future.done() and not future.cancelled() and future.exception() is None:
+                results.append(future.result())
+            else:
+                results.append(dict(self.score_lexical(url), **dict.fromkeys(HeaderFeatures.model_computed_fields)))
+        return results
+
+    def pack(self, results: list[dict[str, Any]], keys: list[str]) -> bytes:
+        """Pack Numeric Features into a row-major float64 array, NaN for nulls."""
+        return np.array(
+            [[np.nan if result.get(key) is None else float(result[key]) for key in keys] for result in results],
+            dtype=np.float64
+        ).tobytes()
+
+    async def handle_score(self, query: dict[str, list[str]], body: bytes) -> tuple[int, dict[str, str], bytes]:
+        try:
+            payload = json.loads(body or b"{}")
+            urls = payload["urls"] if "urls" in payload else [payload["url"]]
+            if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+                raise ValueError("urls must be a list of strings")
+        except Exception as e:
+            return 400, {}, json.dumps({"error": f"Invalid request body: {e}"}).encode()
+        if len(urls) > self.service_max_batch:
+            return 413, {}, json.dumps({"error": f"At most {self.service_max_batch} URLs per request."}).encode()
+
+        network = query.get("tier", ["lexical"])[0] == "network"
+        if network and self._pending + len(urls) > self.service_max_pending:
+            headers = {"Content-Type": "application/json", "Retry-After": "1"}
+            return 503, headers, json.dumps({"error": "Too many pending network requests."}).encode()
+        start = perf_counter()
+        try:
+            results = await self.score(urls, network)
+        except ValueError as e:
+            # e.g. a non-numeric port, raised by urlparse on first use.
+            return 400, {}, json.dumps({"error": f"Invalid URL: {e}"}).encode()
+        elapsed = f"{(perf_counter() - start) * 1000:.3f}"
+
+        if query.get("format", ["json"])[0] == "binary":
+            keys = self.network_keys if network else self.lexical_keys
+            headers = {
+                "Content-Type": "application/octet-stream",
+                "X-Feature-Keys": ",".join(keys),
+                "X-Shape": f"{len(results)},{len(keys)}",
+                "X-Elapsed-Ms": elapsed,
+            }
+            return 200, headers, self.pack(results, keys)
+        headers = {"Content-Type": "application/json", "X-Elapsed-Ms": elapsed}
+        return 200, headers, json.dumps({"results": results}, default=str).encode()
+
+    async def route(self, method: str, target: str, body: bytes) -> tuple[int, dict[str, str], bytes]:
+        parts = urlsplit(target)
+        if parts.path == "/health":
+            return 200, {"Content-Type": "application/json"}, b'{"status": "ok"}'
+        if parts.path != "/score":
+            return 404, {}, b""
+        if method != "POST":
+            return 405, {}, b""
+        return await self.handle_score(parse_qs(parts.query), body)
+
+    async def handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on a keep-alive connection."""
+        try:
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, response_headers, content = await self.route(method, target, body)
+                except Exception as e:
+                    # Answer this request and keep the connection for the next ones.
+                    logging.error(f"Error scoring request: {e}")
+                    status, response_headers, content = 500, {}, json.dumps({"error": str(e)}).encode()
+                head = f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Length: {len(content)}\r\n"
+                head += "".join(f"{k}: {v}\r\n" for k, v in response_headers.items())
+                writer.write(head.encode("latin-1") + b"\r\n" + content)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except Exception as e:
+            logging.error(f"Error serving request: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        server = await start_server(self.handle, self.service_host, self.service_port)
+        logging.info(f"Scoring service listening on {self.service_host}:{self.service_port}.")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run(ScoringService().serve())
@@ -3,7 +3,7 @@ from lib.data.extract import FeatureExtractor
 
 async def main():
     loader = FeatureExtractor()
-    await loader.save()
+    await loader.run()
 
 if __name__ == "__main__":
     run(main())
\ No newline at end of file
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+
+class FakeCollection:
+    """In-memory stand-in for the pymongo Collection methods the extractor uses."""
+
+    def __init__(self):
+        self.documents = {}
+        self.next_id = 0
+
+    @classmethod
+    def matches(cls, document, query):
+        for key, condition in query.items():
+            if key == "$or":
+                if not any(cls.matches(document, option) for option in condition):
+                    return False
+            elif isinstance(condition, dict):
+                if "$in" in condition and document.get(key) not in condition["$in"]:
+                    return False
+                if "$exists" in condition and (key in document) != condition["$exists"]:
+                    return False
+                if "$lt" in condition and (document.get(key) is None or not document[key] < condition["$lt"]):
+                    return False
+            elif document.get(key) != condition:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        return [dict(document) for document in self.documents.values() if self.matches(document, query)]
+
+    def find_one(self, query, projection=None):
+        return next(iter(self.find(query)), None)
+
+    def _update(self, query, update, upsert=False, sort=None):
+        """Apply an update to the first match, returning (document, matched, upserted_id, modified)."""
+        found = [document for document in self.documents.values() if self.matches(document, query)]
+        if sort:
+            key, _ = sort[0]
+            found.sort(key=lambda document: document[key])
+        if found:
+            document = found[0]
+            before = dict(document)
+        elif upsert:
+            document = {key: value for key, value in query.items() if not key.startswith("$")}
+            document.setdefault("_id", self._new_id())
+            document.update(update.get("$setOnInsert", {}))
+            self.documents[document["_id"]] = document
+        else:
+            return None, 0, None, False
+        document.update(update.get("$set", {}))
+        for key, step in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + step
+        if found:
+            return document, 1, None, document != before
+        return document, 0, document["_id"], False
+
+    def _new_id(self):
+        self.next_id += 1
+        return f"fake-{self.next_id}"
+
+    def update_one(self, query, update, upsert=False):
+        _, matched, upserted_id, modified = self._update(query, update, upsert)
+        return SimpleNamespace(matched_count=matched, modified_count=int(modified), upserted_id=upserted_id)
+
+    def find_one_and_update(self, query, update, sort=None, return_document=None, upsert=False):
+        document, *_ = self._update(query, update, upsert, sort)
+        return None if document is None else dict(document)
+
+    def replace_one(self, query, replacement, upsert=False):
+        found = self.find_one(query)
+        if found is None and not upsert:
+            return SimpleNamespace(matched_count=0)
+        _id = found["_id"] if found else self._new_id()
+        self.documents[_id] = dict(replacement, _id=_id)
+        return SimpleNamespace(matched_count=int(found is not None))
+
+    def create_index(self, *args, **kwargs):
+        pass
@@ -0,0 +1,74 @@
+from typing import Optional
+
+import numpy as np
+import pytest
+from pydantic import computed_field
+
+from lib.data.cache import FeatureCache, numeric_keys
+from lib.features.base import Feature
+from lib.features.lexical import LexicalFeatures
+
+
+DOCUMENTS = [
+    {"a": 1, "b": 2.5, "lx_label": "benign"},
+    {"a": None, "b": True, "lx_label": "phishing"},
+    {"a": 3, "lx_label": None},
+]
+
+
+class Fields(Feature):
+    @computed_field
+    def count(self) -> int:
+        return 1
+
+    @computed_field
+    def ratio(self) -> Optional[float]:
+        return None
+
+    @computed_field
+    def name(self) -> str:
+        return ""
+
+    @computed_field
+    def codes(self) -> list[int]:
+        return []
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FeatureCache(path=str(tmp_path / "features.bin"), keys=["a", "b"]).export(DOCUMENTS, len(DOCUMENTS))
+
+
+def test_numeric_keys_reads_deferred_return_types():
+    assert numeric_keys([Fields]) == ["count", "ratio"]
+    assert "lx_url_length" in numeric_keys([LexicalFeatures])
+
+
+def test_export_round_trip(cache):
+    assert cache.is_valid and len(cache) == 3
+    features, labels = cache[:]
+    np.testing.assert_array_equal(features, [[1, 2.5], [np.nan, 1], [3, np.nan]])
+    assert labels.tolist() == [0, 3, -1]
+
+
+def test_rows_are_writable_views_that_never_reach_the_file(cache):
+    features, _ = cache[0]
+    assert isinstance(features, np.memmap) and features.flags.writeable
+    features[0] = 42
+    assert FeatureCache(path=cache.path, keys=cache.keys)[0][0][0] == 1
+
+
+def test_index_arrays_select_rows(cache):
+    features, labels = cache[np.asarray([2, 0])]
+    np.testing.assert_array_equal(features, [[3, np.nan], [1, 2.5]])
+    assert labels.tolist() == [-1, 0]
+
+
+def test_schema_change_invalidates(cache):
+    assert not FeatureCache(path=cache.path, keys=["a"]).is_valid
+    assert not FeatureCache(path=cache.path + ".missing", keys=cache.keys).is_valid
+
+
+def test_short_export_records_written_rows(tmp_path):
+    cache = FeatureCache(path=str(tmp_path / "short.bin"), keys=["a"]).export(DOCUMENTS[:2], 5)
+    assert len(cache) == 2 and cache.capacity == 5
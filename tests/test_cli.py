@@ -0,0 +1,69 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+import lib.cli as cli
+from lib.cli import JSONLSink, NpySink, Sink, main
+from lib.features.lexical import LexicalFeatures
+
+
+URLS = ["http://example.com/a", "https://login.example.org/b?c=d", "example.net", "http://example.com/a"]
+FIELDS = "lx_url_raw,lx_url_length,lx_has_port"
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text("\n".join(URLS[:2]) + "\n" + json.dumps({"url": URLS[2], "label": "benign"}) + "\n" + URLS[3])
+    return str(path)
+
+
+def extract(inputs, tmp_path, fmt):
+    output = tmp_path / f"out.{fmt}"
+    assert main([inputs, "--offline", "--workers", "0", "--fields", FIELDS, "-f", fmt, "-o", str(output)]) == 0
+    return output
+
+
+def test_jsonl(inputs, tmp_path):
+    rows = [json.loads(line) for line in extract(inputs, tmp_path, "jsonl").read_text().splitlines()]
+    assert sorted(row["lx_url_raw"] for row in rows) == sorted(set(URLS))
+    assert all(row["lx_url_length"] == len(row["lx_url_raw"]) for row in rows)
+
+
+def test_csv(inputs, tmp_path):
+    with open(extract(inputs, tmp_path, "csv"), newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == FIELDS.split(",") and len(rows) == 3
+
+
+def test_npy(inputs, tmp_path):
+    array = np.load(extract(inputs, tmp_path, "npy"))
+    assert array.dtype.names == ("lx_url_length", "lx_has_port") and array.shape == (3,)
+    assert sorted(array["lx_url_length"].tolist()) == sorted(float(len(url)) for url in set(URLS))
+
+
+def test_npy_sink_spools_batches(tmp_path):
+    path = tmp_path / "rows.npy"
+    with open(path, "wb") as f:
+        sink = NpySink(f, ["lx_url_length", "lx_url_raw"], [LexicalFeatures])
+        for start in range(0, 10, 3):
+            sink([{"lx_url_length": i, "lx_url_raw": "x"} if i % 4 else {} for i in range(start, min(start + 3, 10))])
+        sink.close()
+    array = np.load(path)
+    assert array.shape == (10,) and np.isnan(array["lx_url_length"][::4]).all()
+    assert array["lx_url_length"][1] == 1
+
+
+def test_missing_arrow_dependency_is_a_clean_error(inputs, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cli, "find_spec", lambda name: None)
+    output = tmp_path / "out.arrow"
+    assert main([inputs, "--offline", "-f", "arrow", "-o", str(output)]) == 2
+    assert "pip install 'urlprint[arrow]'" in capsys.readouterr().err and not output.exists()
+
+
+def test_sinks_must_implement_write():
+    with pytest.raises(TypeError):
+        Sink(None, [], [])
+    assert JSONLSink(None, [], []).keys == []
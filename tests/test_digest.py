@@ -0,0 +1,55 @@
+import pytest
+
+import lib.features.base as base
+from lib.features.base import Feature, URLComponent
+from lib.features.digest import HeaderDigest
+from lib.features.header import HeaderFeatures
+from lib.features.probe import Hop
+
+
+HOPS = [
+    Hop(url="http://example.com/", status_code=301, location="https://example.com/"),
+    Hop(
+        url="https://example.com/", status_code=200,
+        headers={"server": "nginx", "keep-alive": "timeout=5, max=100", "cache-control": "max-age=60"},
+        cookies={"session": "abc123", "theme": "dark"},
+    ),
+]
+
+
+def test_digest_keeps_only_reduced_values():
+    digest = HeaderDigest.from_hops(HOPS)
+    values = "nginxtimeout=5, max=100max-age=60"
+    assert digest.header_entropy == Feature.entropy(values) and digest.header_length == len(values)
+    assert digest.cookie_entropy == Feature.entropy("abc123dark") and digest.num_cookies == 2
+    assert (digest.max_age, digest.keep_alive_timeout, digest.keep_alive_max) == (60, 5, 100)
+    assert digest.redirects == ("http://example.com/",) and digest.num_history == 1
+    assert not {"header_values", "cookie_values", "cookies"} & set(HeaderDigest.model_fields)
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    calls = []
+
+    def follow(url):
+        calls.append(url)
+        return list(HOPS)
+
+    monkeypatch.setattr(base, "follow", follow)
+    return calls
+
+
+def test_header_features_read_the_digest(probes):
+    features = HeaderFeatures(components=URLComponent(url="http://example.com/"))
+    assert features.hd_header_entropy == features.hd_digest.header_entropy
+    assert features.hd_cookie_entropy == features.hd_digest.cookie_entropy
+    assert features.hd_num_cookie_params == 2 and features.hd_server == "nginx"
+    assert probes == ["http://example.com/"]
+
+
+def test_hops_are_not_probed_again_after_the_digest(probes):
+    components = URLComponent(url="http://example.com/")
+    assert components.cp_digest is not None
+    with pytest.raises(RuntimeError):
+        components.cp_hops
+    assert probes == ["http://example.com/"]
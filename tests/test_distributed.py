@@ -0,0 +1,96 @@
+import json
+from threading import Event
+from types import SimpleNamespace
+from datetime import timedelta
+
+import pytest
+
+from lib.data.distributed import DistributedExtractor
+from lib.data.stats import FeatureStatistics
+from tests.fakes import FakeCollection
+
+
+URLS = [f"http://host{i}.example{i % 3}.com/page/{i}" for i in range(10)]
+
+
+@pytest.fixture
+def database():
+    return {"features": FakeCollection(), "extract_leases": FakeCollection()}
+
+
+def extractor(database, **settings) -> DistributedExtractor:
+    worker = DistributedExtractor(
+        aws_source="unused", mongo_extract_database="test", mongo_extract_collection="features",
+        projection=["lx_url_raw", "lx_url_raw_entropy"], heartbeat_seconds=0.01, **{"num_partitions": 3, **settings}
+    )
+    worker.__dict__["atlas"] = SimpleNamespace(database=database, collection=database["features"])
+    worker.__dict__["source_lines"] = [json.dumps({"url": url}) for url in URLS]
+    return worker
+
+
+@pytest.mark.parametrize("strategy", ["range", "host"])
+def test_work_completes_every_partition(database, strategy):
+    worker = extractor(database, partition_strategy=strategy)
+    worker.plan_partitions()
+
+    assert worker.work() == 3
+    leases = database["extract_leases"].find({})
+    assert [lease["status"] for lease in leases] == ["done"] * 3
+    assert all(lease["owner"] == worker.worker_id for lease in leases)
+    assert sorted(doc["lx_url_raw"] for doc in database["features"].find({})) == sorted(URLS)
+
+
+def test_reprocessed_partitions_write_each_url_once(database):
+    extractor(database, partition_strategy="range").plan_partitions()
+    extractor(database, partition_strategy="range", worker_id="first").work()
+    for lease in database["extract_leases"].documents.values():
+        lease["status"] = "pending"
+
+    assert extractor(database, partition_strategy="range", worker_id="second").work() == 3
+    assert len(database["features"].documents) == len(URLS)
+
+
+def test_expired_lease_is_reclaimed(database):
+    dead = extractor(database, worker_id="dead")
+    dead.plan_partitions()
+    claimed = dead.claim()
+    database["extract_leases"].documents[claimed["_id"]]["lease_expires"] = dead.now() - timedelta(seconds=1)
+    for lease in database["extract_leases"].documents.values():
+        if lease["_id"] != claimed["_id"]:
+            lease["status"] = "done"
+
+    reclaimed = extractor(database, worker_id="alive").claim()
+    assert reclaimed["_id"] == claimed["_id"]
+    assert reclaimed["owner"] == "alive"
+    assert reclaimed["attempts"] == 2
+
+
+def test_heartbeat_flags_a_lost_lease(database):
+    worker = extractor(database)
+    worker.plan_partitions()
+    partition = worker.claim()
+    database["extract_leases"].documents[partition["_id"]]["owner"] = "other"
+
+    lost, stop = Event(), Event()
+    worker.heartbeat(partition, lost, stop)
+    assert lost.is_set()
+    assert not worker.complete(partition)
+
+
+def test_host_partitions_follow_the_planned_count(database):
+    extractor(database, partition_strategy="host").plan_partitions()
+    worker = extractor(database, partition_strategy="host", num_partitions=5)
+
+    assert worker.work() == 3
+    assert sorted(doc["lx_url_raw"] for doc in database["features"].find({})) == sorted(URLS)
+    assert list(worker._buckets) == [3]
+
+
+def test_workers_refuse_a_shared_stats_file(database):
+    with pytest.raises(ValueError):
+        extractor(database, stats_path="stats.json").stats
+    worker = extractor(database, mongo_stats_collection="stats")
+    database["stats"] = FakeCollection()
+    worker.plan_partitions()
+    worker.work()
+    assert FeatureStatistics.combine(database["stats"].find({})).documents == len(URLS)
@@ -0,0 +1,50 @@
+"""Several worker processes against a real MongoDB, skipped unless
+URLPRINT_TEST_MONGO_URI points at a server the test may write to."""
+import os
+import json
+from uuid import uuid4
+from multiprocessing import get_context
+
+import pytest
+
+from lib.data.distributed import DistributedExtractor
+
+
+MONGO_URI = os.environ.get("URLPRINT_TEST_MONGO_URI")
+URLS = [f"http://host{i}.example{i % 7}.com/page/{i}" for i in range(200)]
+
+pytestmark = pytest.mark.skipif(MONGO_URI is None, reason="URLPRINT_TEST_MONGO_URI is not set")
+
+
+def extractor(database: str, worker_id: str) -> DistributedExtractor:
+    worker = DistributedExtractor(
+        aws_source="unused", mongo_uri=MONGO_URI, mongo_extract_database=database, mongo_extract_collection="features",
+        projection=["lx_url_raw", "lx_url_raw_entropy"], num_partitions=16, heartbeat_seconds=0.5,
+        worker_id=worker_id
+    )
+    worker.__dict__["source_lines"] = [json.dumps({"url": url}) for url in URLS]
+    return worker
+
+
+def work(database: str, worker_id: str) -> int:
+    return extractor(database, worker_id).work()
+
+
+@pytest.fixture
+def database():
+    from pymongo import MongoClient
+
+    name = f"urlprint_test_{uuid4().hex[:8]}"
+    yield name
+    MongoClient(MONGO_URI).drop_database(name)
+
+
+def test_workers_share_the_partitions(database):
+    extractor(database, "planner").plan_partitions()
+    with get_context("spawn").Pool(4) as pool:
+        completed = pool.starmap(work, [(database, f"worker-{i}") for i in range(4)])
+
+    worker = extractor(database, "check")
+    assert sum(completed) == 16
+    assert [lease["status"] for lease in worker.leases.find({})] == ["done"] * 16
+    assert sorted(doc["lx_url_raw"] for doc in worker.atlas.collection.find({})) == sorted(URLS)
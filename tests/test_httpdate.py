@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import lib.features.base as base
+from lib.features.base import Feature
+from lib.features.httpdate import parse_http_date
+
+
+EXPECTED = datetime(1994, 11, 6, 8, 49, 37, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("value", [
+    "Sun, 06 Nov 1994 08:49:37 GMT",
+    "Sunday, 06-Nov-94 08:49:37 GMT",
+    "Sun Nov  6 08:49:37 1994",
+    "  Sun, 06 Nov 1994 08:49:37 GMT\r\n",
+])
+def test_http_date_formats(value):
+    assert parse_http_date(value) == EXPECTED
+
+
+def test_rfc850_two_digit_years_stay_within_fifty_years():
+    year = datetime.now(timezone.utc).year
+    ahead = (year + 60) % 100
+    assert parse_http_date(f"Monday, 01-Jan-{ahead:02d} 00:00:00 GMT").year == year + 60 - 100
+
+
+@pytest.mark.parametrize("value", [
+    "Sun, 06 Foo 1994 08:49:37 GMT",
+    "Thu, 30 Feb 2023 08:49:37 GMT",
+    "Sun, 06 Nov 1994 08:49:37 UTC",
+    "Sun, 06 Nov 1994 25:49:37 GMT",
+    "1994-11-06T08:49:37Z",
+    "",
+])
+def test_invalid_http_dates(value):
+    assert parse_http_date(value) is None
+
+
+def test_fuzzy_fallback_for_other_formats():
+    assert Feature.parse_date_string("1994-11-06T08:49:37Z") == EXPECTED
+    assert Feature.parse_date_string("not a date") is None
+    assert Feature.parse_date_string(None) is None
+
+
+def test_partial_dates_use_the_current_date_on_every_call(monkeypatch):
+    class Clock(datetime):
+        today = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.today
+
+    monkeypatch.setattr(base, "datetime", Clock)
+    assert Feature.parse_date_string("10:00").date() == datetime(2024, 1, 1).date()
+    Clock.today = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+    assert Feature.parse_date_string("10:00").date() == datetime(2024, 6, 1).date()
@@ -0,0 +1,23 @@
+import sys
+import subprocess
+from types import ModuleType
+
+import lib.data.load as load
+
+
+def test_import_does_not_pull_in_torch():
+    code = "import sys, lib.data.load; assert 'torch' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_dataset_is_built_on_first_access(monkeypatch):
+    Dataset = type("Dataset", (), {})
+    modules = {name: ModuleType(name) for name in ("torch", "torch.utils", "torch.utils.data")}
+    modules["torch.utils.data"].Dataset = Dataset
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(load.__dict__, "URLDataset", raising=False)
+
+    cls = load.URLDataset
+    assert issubclass(cls, Dataset) and issubclass(cls, load._URLDataset)
+    assert load.URLDataset is cls and cls.__module__ == "lib.data.load"
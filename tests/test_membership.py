@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+import lib.features.membership as membership
+from lib.features.base import URLComponent
+from lib.features.membership import ListFeatures, MembershipIndex, build_index, entries
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("Evil.com.\n", ["evil.com"]),
+    ("www.evil.com  # reported", ["evil.com"]),
+    ("1,google.com", ["google.com"]),
+    ("0.0.0.0 ads.tracker.net", ["ads.tracker.net"]),
+    ("127.0.0.1\tone.test two.test # aliases", ["one.test", "two.test"]),
+    ("::1 localhost ip6-localhost", []),
+    ("0.0.0.0 0.0.0.0", []),
+    ("# comment only", []),
+    ("", []),
+])
+def test_entries(line, expected):
+    assert entries(line) == expected
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "list.npy")
+    lines = ["evil.com", "0.0.0.0 ads.tracker.net", "127.0.0.1 localhost", "evil.com", "# header"]
+    assert build_index(lines, path) == 2
+    return MembershipIndex(path)
+
+
+def test_lookup(index):
+    assert index.contains(["EVIL.com", "www.evil.com", "ads.tracker.net", "good.com", "localhost"]).tolist() == [
+        True, True, True, False, False
+    ]
+    assert "evil.com" in index and 0 < index.false_positive_rate < 1e-18
+
+
+def test_build_leaves_no_temp_files(index, tmp_path):
+    build_index(["other.com"], index.path)
+    assert os.listdir(tmp_path) == ["list.npy"]
+    assert "other.com" in MembershipIndex(index.path)
+
+
+def test_empty_index(tmp_path):
+    path = str(tmp_path / "empty.npy")
+    build_index([], path)
+    assert MembershipIndex(path).contains(["a.com"]).tolist() == [False]
+
+
+def test_list_features(index, monkeypatch):
+    settings = type("Settings", (), {"blocklist_path": index.path, "allowlist_path": None})()
+    monkeypatch.setattr(membership, "membership_settings", lambda: settings)
+    features = ListFeatures(components=URLComponent(url="http://login.evil.com/", offline=True))
+    assert (features.ls_blocklisted_host, features.ls_blocklisted_domain) == (False, True)
+    assert features.ls_allowlisted_host is None and features.ls_allowlisted_domain is None
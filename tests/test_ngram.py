@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from lib.features.base import URLComponent
+from lib.features.ngram import HashedNGramVectorizer, NGramFeatures, split_url
+
+
+def columns(vectorizer, url):
+    return set(vectorizer.transform([url]).indices.tolist())
+
+
+def test_split_url():
+    assert split_url("http://user@example.com:80/a?b#c") == ("example.com", "/a?b#c")
+    assert split_url("example.com/a") == ("example.com", "/a")
+    assert split_url("") == ("", "")
+
+
+def test_host_and_path_use_separate_namespaces():
+    vectorizer = HashedNGramVectorizer(ngram_min=6, ngram_max=6)
+    assert not columns(vectorizer, "http://paypal.com/") & columns(vectorizer, "http://x.io/paypal")
+
+
+def test_hashes_are_stable_and_rows_normalized():
+    urls = ["http://example.com/login?next=/account", "https://bank.example.co.uk/"]
+    first, second = HashedNGramVectorizer().transform(urls), HashedNGramVectorizer().transform(urls[::-1])
+    assert first.shape == (2, 2 ** 18)
+    assert (first[0] != second[1]).nnz == 0
+    np.testing.assert_allclose(np.sqrt(first.multiply(first).sum(axis=1)).A1, 1, rtol=1e-6)
+
+
+def test_width_bounds_the_columns():
+    matrix = HashedNGramVectorizer(width=16, normalize=False).transform(["http://example.com/a/b/c"])
+    assert matrix.shape == (1, 16) and matrix.indices.max() < 16
+
+
+@pytest.mark.parametrize("lowercase, same", [(True, True), (False, False)])
+def test_lowercase(lowercase, same):
+    vectorizer = HashedNGramVectorizer(lowercase=lowercase)
+    assert (columns(vectorizer, "http://EXAMPLE.com/") == columns(vectorizer, "http://example.com/")) == same
+
+
+def test_feature_set_matches_the_vectorizer():
+    features = NGramFeatures(components=URLComponent(url="http://example.com/a", offline=True))
+    vector = HashedNGramVectorizer().transform(["http://example.com/a"])
+    assert features.ng_indices == vector.indices.tolist()
+    assert features.ng_values == pytest.approx(vector.data.tolist())
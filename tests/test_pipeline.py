@@ -0,0 +1,51 @@
+from asyncio import run
+
+from lib.data.pipeline import Pipeline
+from lib.features.lexical import LexicalFeatures
+
+
+URLS = [f"http://host{i}.example.com/page" for i in range(50)]
+
+
+def pipeline(source, sink, **settings) -> Pipeline:
+    return Pipeline(
+        source=source, feature_sets=[LexicalFeatures], sink=sink, projection=["lx_url_raw"], offline=True,
+        compute_workers=0, compute_batch=8, sink_batch=10, **settings
+    )
+
+
+def test_every_item_is_drained_to_the_sink():
+    written = []
+    counts = run(pipeline([{"url": url} for url in URLS + URLS[:5]], written.extend).run())
+    assert sorted(feature["lx_url_raw"] for feature in written) == sorted(URLS)
+    assert counts["read"] == 55 and counts["skipped"] == 5 and counts["written"] == 50
+
+
+def test_sink_errors_do_not_stop_the_pipeline():
+    written, calls = [], []
+
+    def sink(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            error = Exception("duplicate key")
+            error.details = {"nInserted": 3}
+            raise error
+        written.extend(batch)
+
+    counts = run(pipeline([{"url": url} for url in URLS], sink).run())
+    assert counts["written"] == 3 + len(written) and counts["sink_errors"] == calls[0] - 3
+    assert counts["written"] + counts["sink_errors"] == len(URLS)
+
+
+def test_stop_drains_the_items_already_read():
+    written = []
+
+    def source():
+        for i, url in enumerate(URLS):
+            if i == 20:
+                runner.stop()
+            yield {"url": url}
+
+    runner = pipeline(source(), written.extend, dedup_batch=10)
+    counts = run(runner.run())
+    assert counts["read"] < len(URLS) and counts["written"] == counts["read"] == len(written)
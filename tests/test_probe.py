@@ -0,0 +1,95 @@
+from time import sleep
+from threading import Thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lib.features.probe import Hop, HopCache, RetryPolicy, follow
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+    routes = {
+        "/start": (302, "/gate", "session=1"),
+        "/gate": (302, "/done", None),
+        "/done": (200, None, None),
+        "/missing": (404, None, None),
+        "/moved": (301, "/missing", None),
+        "/login": (200, None, None),
+    }
+
+    def do_HEAD(self):
+        self.server.requests.append((self.path, self.headers.get("cookie")))
+        status, location, cookie = self.routes[self.path]
+        if self.path == "/gate" and self.headers.get("cookie") != "session=1":
+            status, location = 302, "/login"
+        self.send_response(status)
+        if location:
+            self.send_header("Location", location)
+        if cookie:
+            self.send_header("Set-Cookie", f"{cookie}; Path=/")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def probe(server, path, cache):
+    chain = follow(f"http://127.0.0.1:{server.server_address[1]}{path}", timeout=5, cache=cache, policy=RetryPolicy())
+    return [hop.url.rsplit("/", 1)[-1] for hop in chain]
+
+
+def test_cookies_are_sent_on_later_hops(server):
+    assert probe(server, "/start", HopCache(ttl=60, maxsize=10)) == ["start", "gate", "done"]
+    assert server.requests == [("/start", None), ("/gate", "session=1"), ("/done", "session=1")]
+
+
+def test_only_redirect_hops_are_cached(server):
+    cache = HopCache(ttl=60, maxsize=10)
+    probe(server, "/start", cache)
+    probe(server, "/moved", cache)
+    assert len(cache) == 3
+    server.requests.clear()
+    assert probe(server, "/start", cache) == ["start", "gate", "done"]
+    assert probe(server, "/moved", cache) == ["moved", "missing"]
+    assert server.requests == [("/done", "session=1"), ("/missing", None)]
+
+
+def test_each_domain_is_capped_in_the_cache():
+    cache = HopCache(ttl=60, maxsize=10, domain_maxsize=2)
+    hop = Hop(url="http://a.example.com/", status_code=301, location="/")
+    for i in range(5):
+        cache.put(f"http://t{i}.tracker.com/{i}", hop)
+    cache.put("http://www.example.com/", hop)
+    assert len(cache) == 3
+    assert cache.get("http://t3.tracker.com/3") and cache.get("http://t4.tracker.com/4")
+    assert cache.get("http://t0.tracker.com/0") is None and cache.get("http://www.example.com/")
+
+    for i in range(12):
+        cache.put(f"http://site{i}.org/", hop)
+    assert len(cache) == 10 and cache.get("http://www.example.com/") is None
+
+
+def test_failed_attempts_are_recorded_as_censored_latencies():
+    from requests.exceptions import Timeout
+
+    def fetch(url, timeout):
+        sleep(0.02)
+        raise Timeout(url)
+
+    policy = RetryPolicy(retries=0, hedge=True, hedge_min_samples=1, hedge_quantile=0.5)
+    with pytest.raises(Timeout):
+        policy.fetch("http://slow.test/", 1, fetch)
+    assert policy.hedge_delay() >= 0.02
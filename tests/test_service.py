@@ -0,0 +1,46 @@
+import json
+from time import sleep
+from asyncio import run
+from threading import Event
+
+import pytest
+
+from lib.service.server import REASONS, ScoringService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    release = Event()
+    calls = []
+
+    def score_network(url):
+        calls.append(url)
+        release.wait(5)
+        return {"url": url}
+
+    monkeypatch.setattr(ScoringService, "score_network", staticmethod(score_network))
+    service = ScoringService(service_budget=0.05, service_workers=1, service_max_pending=3)
+    yield service, calls
+    release.set()
+    service.executor.shutdown(wait=True)
+
+
+def request(service, urls):
+    return run(service.handle_score({"tier": ["network"]}, json.dumps({"urls": urls}).encode()))
+
+
+def test_unfinished_probes_are_cancelled(service):
+    service, calls = service
+    status, _, body = request(service, ["http://a.test/", "http://b.test/"])
+    assert status == 200 and len(json.loads(body)["results"]) == 2
+    sleep(0.05)
+    assert calls == ["http://a.test/"]
+    assert service._pending == 1
+
+
+def test_full_pool_is_rejected(service):
+    service, _ = service
+    request(service, ["http://a.test/"])
+    status, headers, _ = request(service, ["http://b.test/", "http://c.test/", "http://d.test/"])
+    assert status == 503 and status in REASONS and headers["Retry-After"] == "1"
+    assert request(service, ["http://b.test/", "http://c.test/"])[0] == 200
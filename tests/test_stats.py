@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+import pytest
+
+from lib.data.stats import FeatureStatistics, Moments, QuantileSketch, QUANTILES
+from tests.fakes import FakeCollection
+
+
+random.seed(7)
+VALUES = [random.lognormvariate(0, 2) * random.choice([1, 1, 1, -1]) for _ in range(5000)] + [0.0] * 50
+
+
+def test_merged_moments_match_a_single_pass():
+    whole, left, right = Moments(), Moments(), Moments()
+    for i, value in enumerate(VALUES + [None] * 10):
+        whole.update(value)
+        (left if i % 3 else right).update(value)
+    left.merge(right)
+    assert left.count == whole.count == len(VALUES) and left.nulls == 10
+    assert left.mean == pytest.approx(np.mean(VALUES)) and left.variance == pytest.approx(np.var(VALUES, ddof=1))
+    assert (left.min, left.max) == (min(VALUES), max(VALUES))
+
+
+@pytest.mark.parametrize("q", QUANTILES)
+def test_quantiles_are_within_the_relative_accuracy(q):
+    left, right = QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(VALUES):
+        (left if i % 2 else right).update(value)
+    left.merge(right)
+    expected = sorted(VALUES)[int(q * (len(VALUES) - 1))]
+    assert left.quantile(q) == pytest.approx(expected, rel=0.01)
+
+
+def test_sketch_stays_bounded():
+    sketch = QuantileSketch(max_buckets=16)
+    for value in VALUES:
+        sketch.update(value)
+    assert len(sketch.positive) <= 16 and len(sketch.negative) <= 16 and sketch.count == len(VALUES)
+    assert sketch.quantile(1.0) == pytest.approx(max(VALUES), rel=0.011)
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def documents(n, offset=0):
+    return [{"a": i + offset, "b": None if i % 4 else i, "lx_label": ["benign", "phishing"][i % 2]} for i in range(n)]
+
+
+def test_partial_states_combine_like_one_pass():
+    whole = FeatureStatistics(keys=["a", "b"])
+    collection = FakeCollection()
+    for worker, offset in (("one", 0), ("two", 1000)):
+        partial = FeatureStatistics(keys=["a", "b"])
+        for document in documents(200, offset):
+            partial.update(document)
+            whole.update(document)
+        partial.save_partial(collection, worker)
+
+    combined = FeatureStatistics.combine(collection.find({}), ["a", "b"])
+    summary, expected = combined.summary(), whole.summary()
+    assert summary["documents"] == expected["documents"] == 400
+    for label in ("benign", "phishing"):
+        for key in ("a", "b"):
+            assert summary["by_label"][label][key] == pytest.approx(expected["by_label"][label][key])
+    assert summary["overall"]["b"]["null_rate"] == pytest.approx(0.75)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "stats.json")
+    stats = FeatureStatistics(keys=["a"])
+    for document in documents(50):
+        stats.update(document)
+    stats.save(path)
+    loaded = FeatureStatistics.load(path, ["a", "b"])
+    assert loaded.keys == ["a", "b"] and loaded.summary() == stats.summary()
+    assert FeatureStatistics.load(str(tmp_path / "missing.json"), ["a"]).documents == 0
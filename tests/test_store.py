@@ -0,0 +1,112 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import lib.data.cache as cache
+from lib.data.store import FeatureStore, pack, unpack
+from lib.features.base import URLComponent
+from lib.features.lexical import LexicalFeatures
+
+
+URLS = ["https://www.example.com/a/b.php?q=1#top", "http://192.168.0.1:8080/login", "example.org"]
+FIELDS = [key for key in LexicalFeatures.model_computed_fields if key != "lx_label"]
+
+
+def features(url):
+    return LexicalFeatures(components=URLComponent(url=url, offline=True)).model_dump(include=set(FIELDS))
+
+
+def store(tmp_path, **settings):
+    return FeatureStore(
+        path=str(tmp_path / "features.db"), feature_sets=[LexicalFeatures], fields=FIELDS, **settings
+    )
+
+
+def total_size(store):
+    return store.connection.execute("SELECT COALESCE(SUM(size), 0) FROM features").fetchone()[0]
+
+
+def test_pack_round_trip():
+    values = [
+        None, True, False, 0, -1, 2 ** 63 - 1, 2 ** 70, -2 ** 70, 1.5, float("inf"), "", "hé\udcff",
+        datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2))), datetime(2024, 1, 2), date(2024, 1, 2),
+        [1, [None, "a"], []],
+    ]
+    unpacked = unpack(pack(values))
+    assert unpacked == values
+    assert unpacked[12].utcoffset() == timedelta(hours=2)
+    assert [type(value) for value in unpacked] == [type(value) for value in values]
+
+
+def test_pack_rejects_other_types():
+    with pytest.raises(TypeError):
+        pack([object()])
+
+
+def test_round_trip(tmp_path):
+    features_store = store(tmp_path, offline=True)
+    expected = {url: features(url) for url in URLS}
+    assert features_store.get_many(URLS) == [None] * len(URLS)
+
+    features_store.put_many(expected.items())
+    assert features_store.get_many(URLS) == [expected[url] for url in URLS]
+    assert len(features_store) == len(URLS)
+    assert features_store.size == total_size(features_store)
+
+    # Overwrites replace the entry and its size in the running total.
+    features_store.put_many([(URLS[0], dict(expected[URLS[0]], lx_url_string="x" * 1000))])
+    assert features_store.get_many(URLS[:1])[0]["lx_url_string"] == "x" * 1000
+    assert len(features_store) == len(URLS)
+    assert features_store.size == total_size(features_store)
+
+
+def test_unpackable_items_are_skipped(tmp_path):
+    features_store = store(tmp_path, offline=True)
+    features_store.put_many([(URLS[0], dict(features(URLS[0]), lx_url_string=object())), (URLS[1], features(URLS[1]))])
+    assert features_store.get_many(URLS[:2]) == [None, features(URLS[1])]
+
+
+def test_network_fields_expire(tmp_path):
+    features_store = store(tmp_path, ttl=-1)
+    assert features_store.parts["network"]
+    features_store.put_many((url, features(url)) for url in URLS)
+    assert len(features_store) == 2 * len(URLS)
+    assert features_store.get_many(URLS) == [None] * len(URLS)
+
+    # Only the expired network parts go, the offline parts never expire.
+    assert features_store.evict() == len(URLS)
+    assert len(features_store) == len(URLS)
+    assert features_store.size == total_size(features_store)
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    features_store = store(tmp_path, offline=True, touch_after=0)
+    urls = [f"https://example.com/{i}" for i in range(20)]
+    features_store.put_many((url, features(url)) for url in urls)
+    assert features_store.evict() == 0
+
+    features_store.get_many(urls[:5])
+    features_store.max_bytes = features_store.size // 2
+    evicted = features_store.evict()
+    assert evicted >= 10
+    assert features_store.size <= features_store.max_bytes * 0.9 + features_store.size / len(features_store)
+    assert len(features_store) == len(urls) - evicted
+    assert features_store.size == total_size(features_store)
+    assert all(features_store.get_many(urls[:5]))
+
+
+def test_schema_hash_includes_feature_version(monkeypatch):
+    before = cache.schema_hash(FIELDS)
+    monkeypatch.setattr(cache, "FEATURE_VERSION", cache.FEATURE_VERSION + 1)
+    assert cache.schema_hash(FIELDS) != before
+
+
+def test_older_stores_are_dropped(tmp_path):
+    features_store = store(tmp_path, offline=True)
+    features_store.put_many([(URLS[0], features(URLS[0]))])
+    features_store.connection.execute("PRAGMA user_version = 1")
+    features_store.connection.close()
+
+    reopened = store(tmp_path, offline=True)
+    assert len(reopened) == 0
+    assert reopened.get_many(URLS[:1]) == [None]
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+import lib.features.suffix as suffix
+from lib.features.suffix import HostParts, SuffixTrie, compile_suffix_list, split_host
+
+
+@pytest.mark.parametrize("host, parts", [
+    ("example.com", HostParts("com", "example.com", 0)),
+    ("a.b.example.co.uk", HostParts("co.uk", "example.co.uk", 2)),
+    ("WWW.Example.COM.", HostParts("com", "example.com", 1)),
+    ("foo.bar.ck", HostParts("bar.ck", "foo.bar.ck", 0)),
+    ("www.ck", HostParts("ck", "www.ck", 0)),
+    ("a.city.kawasaki.jp", HostParts("kawasaki.jp", "city.kawasaki.jp", 1)),
+    ("user.github.io", HostParts("github.io", "user.github.io", 0)),
+    ("localhost", HostParts("localhost", None, 0)),
+    ("example.unknowntld", HostParts("unknowntld", "example.unknowntld", 0)),
+    ("192.168.0.1", HostParts(None, None, 0)),
+    ("[::1]", HostParts(None, None, 0)),
+    ("", HostParts(None, None, 0)),
+])
+def test_split_host(host, parts):
+    assert split_host(host) == parts
+
+
+def test_unicode_rules_match_their_punycode_form():
+    assert split_host("example.中国").public_suffix == "中国"
+    assert split_host("example.xn--fiqs8s").public_suffix == "xn--fiqs8s"
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "list.dat"
+    path.write_text("// comment\ncom\n*.ck\n!www.ck\n", encoding="utf-8")
+    return str(path)
+
+
+def test_compiled_trie_round_trip(source):
+    trie = SuffixTrie.load(source)
+    assert os.path.exists(f"{source}.npy")
+    assert trie.split("a.example.com") == HostParts("com", "example.com", 1)
+    assert trie.split("a.b.ck") == HostParts("b.ck", "a.b.ck", 0)
+    assert trie.split("www.ck") == HostParts("ck", "www.ck", 0)
+
+
+def test_unwritable_list_dir_compiles_once_into_the_temp_dir(source, monkeypatch, tmp_path):
+    compiled = []
+
+    def compile_to(src, target=None):
+        if target == f"{src}.npy":
+            raise PermissionError(target)
+        compiled.append(compile_suffix_list(src, target))
+        return target
+
+    monkeypatch.setattr(suffix.tempfile, "gettempdir", lambda: str(tmp_path / "tmp"))
+    os.mkdir(tmp_path / "tmp")
+    monkeypatch.setattr(suffix, "compile_suffix_list", compile_to)
+    first, second = SuffixTrie.load(source), SuffixTrie.load(source)
+    assert len(compiled) == 1 and compiled[0] == SuffixTrie.fallback_path(source)
+    assert compiled[0].startswith(str(tmp_path / "tmp" / "urlprint-psl-"))
+    assert first.split("a.b.ck") == second.split("a.b.ck") == HostParts("b.ck", "a.b.ck", 0)
+    assert os.listdir(tmp_path / "tmp") == [os.path.basename(compiled[0])]
@@ -0,0 +1,48 @@
+import json
+from threading import Timer
+
+import pytest
+
+from lib.data.vocab import NULL, RARE, CategoricalEncoder, SharedVocabulary, Vocabulary
+from tests.fakes import FakeCollection
+
+
+def test_values_are_promoted_at_min_count():
+    vocabulary = Vocabulary(field="lx_tld", min_count=2)
+    assert [vocabulary.encode(value) for value in ["com", None, "com", "com", "org"]] == [RARE, NULL, 2, 2, RARE]
+    assert vocabulary.encode("org", grow=False) == RARE
+    assert vocabulary.decode(2) == "com"
+
+
+def test_checkpoint_saves_only_new_codes(tmp_path):
+    path = tmp_path / "vocab.json"
+    encoder = CategoricalEncoder(path=str(path), fields=["lx_tld"], min_count=1)
+    encoder.encode({"lx_tld": "com"})
+    encoder.checkpoint()
+    assert json.loads(path.read_text())["lx_tld"]["tokens"][2] == "com"
+
+    path.unlink()
+    encoder.encode({"lx_tld": "com"})
+    encoder.checkpoint()
+    assert not path.exists()
+    encoder.encode({"lx_tld": "org"})
+    encoder.checkpoint()
+    assert CategoricalEncoder(path=str(path), fields=["lx_tld"]).encode({"lx_tld": "org"})["lx_tld_code"] == 3
+
+
+def test_shared_codes_have_no_gaps():
+    collection = FakeCollection()
+    first = SharedVocabulary.load(collection, "lx_tld", min_count=1)
+    second = SharedVocabulary.load(collection, "lx_tld", min_count=1)
+    assert [first.encode("com"), second.encode("org"), second.encode("com"), first.encode("org")] == [2, 3, 2, 3]
+    assert SharedVocabulary.load(collection, "lx_tld").tokens == ["<null>", "<rare>", "com", "org"]
+
+
+@pytest.mark.parametrize("owner_dies", [False, True])
+def test_waiting_worker_gets_the_inserters_code(owner_dies):
+    collection = FakeCollection()
+    collection.documents["lx_tld:com"] = {"_id": "lx_tld:com", "field": "lx_tld", "token": "com", "owner": "other"}
+    waiter = SharedVocabulary.load(collection, "lx_tld", min_count=1, claim_timeout=0.2, poll_interval=0.01)
+    if not owner_dies:
+        Timer(0.05, lambda: collection.documents["lx_tld:com"].update(code=7)).start()
+    assert waiter.encode("com") == (7 if not owner_dies else 2)